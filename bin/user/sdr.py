@@ -64,19 +64,37 @@ in the JSON data, for example 'wind_speed_mph' instead of just 'wind_speed'.
 """
 
 from __future__ import with_statement
-from calendar import timegm
+from calendar import monthrange, timegm
 try:
     # Python 3
     import queue
 except ImportError:
     # Python 2:
     import Queue as queue
+import bisect
+import collections
+import errno
+import fcntl
 import fnmatch
+import heapq
 import os
 import re
 import subprocess
 import threading
 import time
+import timeit
+
+try:
+    # Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
 
 try:
     import cjson as json
@@ -88,41 +106,92 @@ except (ImportError, AttributeError):
     except ImportError:
         import json
 
-import weewx.drivers
-import weewx.units
-from weeutil.weeutil import tobool
+try:
+    import weewx.drivers
+    import weewx.units
+    from weeutil.weeutil import tobool
+except ImportError:
+    # without weewx, such as when the parsers are benchmarked on a machine
+    # that does not run weewx, stand in for the parts of weewx and weeutil
+    # that the driver uses.  the values are the same as those in weewx.
+    class weewx(object):
+        US = 0x01
+        METRIC = 0x10
+        METRICWX = 0x11
+
+        class WeeWxIOError(IOError):
+            pass
+
+        class ViolatedPrecondition(ValueError):
+            pass
 
+        class units(object):
+            MILE_PER_KM = 0.621371192
+
+            @staticmethod
+            def kph_to_mph(x):
+                return x * weewx.units.MILE_PER_KM
+
+        class drivers(object):
+            class AbstractDevice(object):
+                pass
+
+            class AbstractConfEditor(object):
+                pass
+
+    def tobool(x):
+        try:
+            if x.lower() in ['true', 'yes', 'y']:
+                return True
+            elif x.lower() in ['false', 'no', 'n']:
+                return False
+        except AttributeError:
+            pass
+        try:
+            return bool(int(x))
+        except (ValueError, TypeError):
+            pass
+        raise ValueError("Unknown boolean specifier: '%s'." % x)
+
+# the log functions take optional arguments for the message.  when arguments
+# are given, the message is formatted only if the level is enabled, so calls
+# in the packet path should pass arguments rather than a formatted string.
 try:
     # New-style weewx logging
     import weeutil.logger
     import logging
     log = logging.getLogger(__name__)
 
-    def logdbg(msg):
-        log.debug(msg)
+    def logdbg(msg, *args):
+        log.debug(msg, *args)
 
-    def loginf(msg):
-        log.info(msg)
+    def loginf(msg, *args):
+        log.info(msg, *args)
 
-    def logerr(msg):
-        log.error(msg)
+    def logerr(msg, *args):
+        log.error(msg, *args)
 
 except ImportError:
     # Old-style weewx logging
     import syslog
 
-    def logmsg(level, msg):
+    def logmsg(level, msg, *args):
+        if args:
+            # a mask of 0 queries the mask without changing it
+            if not syslog.setlogmask(0) & syslog.LOG_MASK(level):
+                return
+            msg = msg % args
         syslog.syslog(level, 'sdr: %s: %s' %
                       (threading.currentThread().getName(), msg))
 
-    def logdbg(msg):
-        logmsg(syslog.LOG_DEBUG, msg)
+    def logdbg(msg, *args):
+        logmsg(syslog.LOG_DEBUG, msg, *args)
 
-    def loginf(msg):
-        logmsg(syslog.LOG_INFO, msg)
+    def loginf(msg, *args):
+        logmsg(syslog.LOG_INFO, msg, *args)
 
-    def logerr(msg):
-        logmsg(syslog.LOG_ERR, msg)
+    def logerr(msg, *args):
+        logmsg(syslog.LOG_ERR, msg, *args)
 
 DRIVER_NAME = 'SDR'
 DRIVER_VERSION = '0.78'
@@ -135,6 +204,8 @@ DRIVER_VERSION = '0.78'
 # -F json - emit data in json format (not all rtl_433 decoders support this)
 # -G      - emit data for all rtl decoders (only available in newer rtl_433)
 #           as of early 2020, the syntax is '-G4', but use only for testing
+# -M stats - emit decoder statistics periodically; the driver keeps them
+# -M level  - add signal and noise levels to each packet; the driver keeps them
 
 # very old implmentations:
 #DEFAULT_CMD = 'rtl_433 -q -U -F json -G'
@@ -150,12 +221,147 @@ def confeditor_loader():
     return SDRConfigurationEditor()
 
 
+class BoundedLineQueue(object):
+    # a queue of lines with an optional bound on the number of lines that
+    # it holds.  when the queue is full, the policy determines what happens
+    # to a new line:
+    #   drop-oldest - discard the oldest line to make room
+    #   drop-unmapped-first - discard the oldest line that the classifier
+    #       says cannot be mapped, then fall back to drop-oldest
+    #   block - wait for room, which eventually blocks rtl_433 on its pipe
+    # get returns every queued line at once, in the order the lines were put.
+    #
+    # with priority, the lines that the classifier wants form a high priority
+    # lane that get returns ahead of the other lines.  when more than
+    # shed_lines are queued, the driver is behind, so get discards the low
+    # priority lane.
+
+    POLICIES = ['drop-oldest', 'drop-unmapped-first', 'block']
+
+    def __init__(self, max_lines=0, policy='drop-oldest', classifier=None,
+                 priority=False, shed_lines=0):
+        if policy not in BoundedLineQueue.POLICIES:
+            raise weewx.ViolatedPrecondition(
+                "unknown queue policy '%s'" % policy)
+        self.max_lines = max_lines
+        self.policy = policy
+        self.priority = priority
+        self.shed_lines = shed_lines
+        self.dropped = 0
+        self._classifier = classifier
+        self._wanted = collections.deque()
+        self._unwanted = collections.deque()
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def qsize(self):
+        return len(self._wanted) + len(self._unwanted)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def close(self):
+        # wake up anything that is blocked, and stop blocking from now on
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        # block again when full, for a new process
+        with self._cond:
+            self._closed = False
+
+    def put(self, batch):
+        if self._classifier is None:
+            labelled = [(x, True) for x in batch]
+        else:
+            labelled = [(x, self._classifier.is_wanted(x)) for x in batch]
+        with self._cond:
+            for (line, wanted) in labelled:
+                if self.max_lines and self.qsize() >= self.max_lines:
+                    if not self._make_room(wanted):
+                        continue
+                self._seq += 1
+                if wanted:
+                    self._wanted.append((self._seq, line))
+                else:
+                    self._unwanted.append((self._seq, line))
+            self._cond.notify_all()
+
+    def _make_room(self, wanted):
+        # return True if there is room for the new line, False if the new
+        # line should be discarded.  the caller holds the lock.
+        if self.policy == 'block':
+            while self.qsize() >= self.max_lines and not self._closed:
+                self._cond.wait(1.0)
+            if self.qsize() < self.max_lines:
+                return True
+        elif self.policy == 'drop-unmapped-first':
+            if self._unwanted:
+                self._unwanted.popleft()
+                self.dropped += 1
+                return True
+            if not wanted:
+                self.dropped += 1
+                return False
+        if not self._unwanted or (
+                self._wanted and self._wanted[0][0] < self._unwanted[0][0]):
+            self._wanted.popleft()
+        else:
+            self._unwanted.popleft()
+        self.dropped += 1
+        return True
+
+    def get(self, block=True, timeout=None):
+        # return a list of every queued line.  raise queue.Empty if there
+        # are no lines after waiting for the timeout.
+        with self._cond:
+            if block and not self.qsize():
+                if timeout is None:
+                    while not self.qsize():
+                        self._cond.wait()
+                else:
+                    end_ts = time.time() + timeout
+                    remaining = timeout
+                    while not self.qsize() and remaining > 0:
+                        self._cond.wait(remaining)
+                        remaining = end_ts - time.time()
+            if not self.qsize():
+                raise queue.Empty
+            if self.priority:
+                if self.shed_lines and self.qsize() > self.shed_lines:
+                    self.dropped += len(self._unwanted)
+                    self._unwanted.clear()
+                items = list(self._wanted) + list(self._unwanted)
+            elif not self._unwanted:
+                items = self._wanted
+            elif not self._wanted:
+                items = self._unwanted
+            else:
+                items = heapq.merge(self._wanted, self._unwanted)
+            lines = [x[1] for x in items]
+            self._wanted = collections.deque()
+            self._unwanted = collections.deque()
+            self._cond.notify_all()
+            return lines
+
+
 class AsyncReader(threading.Thread):
+    # read lines from a pipe and put them onto a queue in batches.  in 'line'
+    # mode each batch is a single line from readline.  in 'chunk' mode the
+    # pipe is read in large chunks and every complete line in a chunk is
+    # queued as one batch, which amortizes the queue locking.  lines are
+    # bytes in either mode.
 
-    def __init__(self, fd, queue, label):
+    READER_MODES = ['line', 'chunk']
+    CHUNK_SIZE = 65536
+
+    def __init__(self, fd, queue, label, mode='line'):
         threading.Thread.__init__(self)
         self._fd = fd
         self._queue = queue
+        self._mode = mode
         self._running = False
         self.setDaemon(True)
         self.setName(label)
@@ -163,11 +369,32 @@ class AsyncReader(threading.Thread):
     def run(self):
         logdbg("start async reader for %s" % self.getName())
         self._running = True
-        for line in iter(self._fd.readline, ''):
-            self._queue.put(line)
+        if self._mode == 'chunk':
+            self._read_chunks()
+        else:
+            self._read_lines()
+
+    def _read_lines(self):
+        for line in iter(self._fd.readline, b''):
+            self._queue.put([line])
             if not self._running:
                 break
 
+    def _read_chunks(self):
+        fileno = self._fd.fileno()
+        partial = b''
+        while self._running:
+            data = os.read(fileno, AsyncReader.CHUNK_SIZE)
+            if not data:
+                break
+            lines = (partial + data).split(b'\n')
+            partial = lines.pop()
+            lines = [x for x in lines if x]
+            if lines:
+                self._queue.put(lines)
+        if partial:
+            self._queue.put([partial])
+
     def stop_running(self):
         self._running = False
 
@@ -175,57 +402,126 @@ class AsyncReader(threading.Thread):
 class ProcManager(object):
     TS = re.compile('^\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d[\s]+')
 
-    def __init__(self):
+    # how often to check the process when there is no output, in seconds
+    POLL_INTERVAL = 3
+
+    # stderr is only for diagnostics, so keep only the most recent lines
+    STDERR_MAX_LINES = 1000
+
+    # how long to wait for the process to exit after it is killed, in seconds
+    KILL_WAIT = 2
+
+    def __init__(self, reader_mode='line', batch_max_lines=1,
+                 batch_max_age=0.0, queue_max_lines=0,
+                 queue_policy='drop-oldest', classifier=None,
+                 priority=False, priority_shed_lines=0):
+        if reader_mode not in AsyncReader.READER_MODES:
+            raise weewx.ViolatedPrecondition(
+                "unknown reader_mode '%s'" % reader_mode)
         self._cmd = None
+        self._path = None
+        self._ld_library_path = None
         self._process = None
-        self.stdout_queue = queue.Queue()
+        self._reader_mode = reader_mode
+        self._batch_max_lines = batch_max_lines
+        self._batch_max_age = batch_max_age
+        self.stdout_queue = BoundedLineQueue(
+            queue_max_lines, queue_policy, classifier,
+            priority, priority_shed_lines)
         self.stdout_reader = None
-        self.stderr_queue = queue.Queue()
+        self.stderr_queue = BoundedLineQueue(ProcManager.STDERR_MAX_LINES)
         self.stderr_reader = None
 
     def startup(self, cmd, path=None, ld_library_path=None):
-        self._cmd = cmd
-        loginf("startup process '%s'" % self._cmd)
-        env = os.environ.copy()
-        if path:
-            env['PATH'] = path + ':' + env['PATH']
-        if ld_library_path:
-            env['LD_LIBRARY_PATH'] = ld_library_path
         try:
-            self._process = subprocess.Popen(cmd.split(' '),
-                                             env=env,
-                                             stdout=subprocess.PIPE,
-                                             stderr=subprocess.PIPE)
+            self._start_process(cmd, path, ld_library_path)
             self.stdout_reader = AsyncReader(
-                self._process.stdout, self.stdout_queue, 'stdout-thread')
+                self._process.stdout, self.stdout_queue, 'stdout-thread',
+                self._reader_mode)
             self.stdout_reader.start()
             self.stderr_reader = AsyncReader(
-                self._process.stderr, self.stderr_queue, 'stderr-thread')
+                self._process.stderr, self.stderr_queue, 'stderr-thread',
+                self._reader_mode)
             self.stderr_reader.start()
         except (OSError, ValueError) as e:
             raise weewx.WeeWxIOError("failed to start process '%s': %s" %
                                      (cmd, e))
 
+    @staticmethod
+    def create(reader_mode='line', **kwargs):
+        # return the process manager for the specified reader mode.  the
+        # select mode uses a single-threaded event loop, the other modes
+        # use a reader thread for each pipe.
+        if reader_mode == 'select':
+            return SelectProcManager(**kwargs)
+        return ProcManager(reader_mode, **kwargs)
+
+    def restart(self):
+        # stop the process, then start it again with the same command.  any
+        # lines still queued from the old process are kept.
+        self.shutdown()
+        self.stdout_queue.reopen()
+        self.stderr_queue.reopen()
+        self.startup(self._cmd, self._path, self._ld_library_path)
+
+    def _start_process(self, cmd, path=None, ld_library_path=None):
+        self._cmd = cmd
+        self._path = path
+        self._ld_library_path = ld_library_path
+        loginf("startup process '%s'" % self._cmd)
+        env = os.environ.copy()
+        if path:
+            env['PATH'] = path + ':' + env['PATH']
+        if ld_library_path:
+            env['LD_LIBRARY_PATH'] = ld_library_path
+        self._process = subprocess.Popen(cmd.split(' '),
+                                         env=env,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE)
+
     def shutdown(self):
+        if self._process is None:
+            return
         loginf('shutdown process %s' % self._cmd)
-        logdbg('waiting for %s' % self.stdout_reader.getName())
         self.stdout_reader.stop_running()
+        self.stdout_queue.close()
+        self.stderr_reader.stop_running()
+        self.stderr_queue.close()
+        # the readers finish when the process is gone and their pipes close,
+        # so do not wait for them while the process is still running
+        self._kill_process()
+        logdbg('waiting for %s' % self.stdout_reader.getName())
         self.stdout_reader.join(10.0)
-        if self.stdout_reader.isAlive():
+        if self.stdout_reader.is_alive():
             loginf('timed out waiting for %s' % self.stdout_reader.getName())
         self.stdout_reader = None
         logdbg('waiting for %s' % self.stderr_reader.getName())
-        self.stderr_reader.stop_running()
         self.stderr_reader.join(10.0)
-        if self.stderr_reader.isAlive():
+        if self.stderr_reader.is_alive():
             loginf('timed out waiting for %s' % self.stderr_reader.getName())
         self.stderr_reader = None
+        self._stop_process()
+
+    def _kill_process(self):
+        # kill the process and give it a moment to exit
+        if self._process.poll() is not None:
+            return
+        logdbg('kill process')
+        try:
+            self._process.kill()
+        except OSError:
+            pass
+        for _ in range(ProcManager.KILL_WAIT * 10):
+            if self._process.poll() is not None:
+                break
+            time.sleep(0.1)
+
+    def _stop_process(self):
+        self._kill_process()
         logdbg("close stdout")
         self._process.stdout.close()
         logdbg("close stderr")
         self._process.stderr.close()
-        logdbg('kill process')
-        self._process.kill()
         if self._process.poll() is None:
             logerr('process did not respond to kill, shutting down anyway')
         self._process = None
@@ -233,32 +529,365 @@ class ProcManager(object):
     def running(self):
         return self._process.poll() is None
 
-    def get_stderr(self):
-        lines = []
-        while not self.stderr_queue.empty():
-            lines.append(self.stderr_queue.get())
-        return lines
+    def pid(self):
+        return self._process.pid if self._process is not None else None
 
-    def get_stdout(self):
-        lines = []
+    def get_stderr(self):
+        try:
+            return self.stderr_queue.get(False)
+        except queue.Empty:
+            return []
+
+    def get_dropped(self):
+        # the number of lines discarded because a queue was full
+        return {'stdout': self.stdout_queue.dropped,
+                'stderr': self.stderr_queue.dropped}
+
+    def get_stdout(self, poll_interval=None):
+        # yield frames of lines as they are released by the framer.  when
+        # there is no output, yield an empty list every poll_interval, or
+        # every POLL_INTERVAL, since the reader threads must be checked.
+        framer = LineFramer(self._batch_max_lines, self._batch_max_age)
         while self.running():
+            deadline = framer.next_deadline()
+            timeout = poll_interval or ProcManager.POLL_INTERVAL
+            if deadline is not None:
+                timeout = max(0, min(timeout, deadline - time.time()))
             try:
-                # Fetch the output line. For it to be searched, Python 3 requires that
-                # it be decoded to unicode. Decoding does no harm under Python 2:
-                line = self.stdout_queue.get(True, 3).decode()
-                m = ProcManager.TS.search(line)
-                if m and lines:
-                    yield lines
-                    lines = []
-                lines.append(line)
+                batch = self.stdout_queue.get(True, timeout)
             except queue.Empty:
-                yield lines
-                lines = []
-        yield lines
+                frames = framer.expire(time.time())
+                if not frames and deadline is None:
+                    frames = [[]]
+            else:
+                frames = framer.add(batch, time.time())
+            for frame in frames:
+                yield frame
+        for frame in framer.flush():
+            yield frame
+
+
+class LineFramer(object):
+    # group lines from rtl_433 into frames for the packet factory.  json
+    # lines are self-contained, so they are released as soon as max_lines
+    # of them are pending, or when the oldest has waited max_age seconds.
+    # plain text packets may span many lines, so text lines are grouped
+    # at each line that begins with a timestamp, and a text frame is
+    # released when the next one begins, when it becomes too long, or
+    # when it has waited TEXT_FRAME_TIMEOUT seconds.
+    #
+    # json lines are passed through as bytes, since the json decoder
+    # accepts bytes.  for other lines to be searched, Python 3 requires
+    # that they be decoded to unicode.  decoding does no harm under
+    # Python 2.
+
+    TEXT_FRAME_TIMEOUT = 3.0
+    MAX_TEXT_LINES = 100
+
+    def __init__(self, max_lines=1, max_age=0.0):
+        self.max_lines = max(1, int(max_lines))
+        self.max_age = max(0.0, float(max_age))
+        self._json = []
+        self._json_ts = None
+        self._text = []
+        self._text_ts = None
+
+    def add(self, batch, now):
+        # add a batch of lines, return a list of the frames that are ready
+        frames = []
+        for line in batch:
+            if line[:1] == b'{':
+                if self._text:
+                    frames.append(self._release_text())
+                if not self._json:
+                    self._json_ts = now
+                self._json.append(line)
+                if len(self._json) >= self.max_lines:
+                    frames.append(self._release_json())
+            else:
+                line = line.decode()
+                if self._text and (
+                        ProcManager.TS.search(line) or
+                        len(self._text) >= LineFramer.MAX_TEXT_LINES):
+                    frames.append(self._release_text())
+                if not self._text:
+                    self._text_ts = now
+                self._text.append(line)
+        frames.extend(self.expire(now))
+        return frames
+
+    def expire(self, now):
+        # return a list of the pending frames that have waited long enough
+        frames = []
+        if self._json and now - self._json_ts >= self.max_age:
+            frames.append(self._release_json())
+        if self._text and (
+                now - self._text_ts >= LineFramer.TEXT_FRAME_TIMEOUT):
+            frames.append(self._release_text())
+        return frames
+
+    def next_deadline(self):
+        # the time at which the next pending frame must be released, or None
+        deadlines = []
+        if self._json:
+            deadlines.append(self._json_ts + self.max_age)
+        if self._text:
+            deadlines.append(self._text_ts + LineFramer.TEXT_FRAME_TIMEOUT)
+        return min(deadlines) if deadlines else None
+
+    def flush(self):
+        # return a list of all pending frames
+        frames = []
+        if self._json:
+            frames.append(self._release_json())
+        if self._text:
+            frames.append(self._release_text())
+        return frames
+
+    def _release_json(self):
+        frame = self._json
+        self._json = []
+        return frame
+
+    def _release_text(self):
+        frame = self._text
+        self._text = []
+        return frame
+
+
+class SelectProcManager(ProcManager):
+    # multiplex the stdout and stderr of the process in the calling thread
+    # using non-blocking pipes and a selector.  there are no reader threads,
+    # output is yielded as soon as a complete line arrives.  when there is
+    # no output and no partial frame the loop sleeps until the process
+    # writes or exits, unless a poll_interval is specified, in which case an
+    # empty list is yielded every poll_interval seconds.
+
+    # the output of the process is read only when the driver is ready for
+    # it, so a slow driver slows rtl_433 instead of filling a queue.  the
+    # queue options are ignored.
+
+    def __init__(self, **kwargs):
+        if selectors is None:
+            raise weewx.ViolatedPrecondition(
+                "reader_mode 'select' requires the selectors module")
+        super(SelectProcManager, self).__init__('chunk', **kwargs)
+
+    def startup(self, cmd, path=None, ld_library_path=None):
+        try:
+            self._start_process(cmd, path, ld_library_path)
+            for f in [self._process.stdout, self._process.stderr]:
+                flags = fcntl.fcntl(f.fileno(), fcntl.F_GETFL)
+                fcntl.fcntl(f.fileno(), fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        except (OSError, ValueError) as e:
+            raise weewx.WeeWxIOError("failed to start process '%s': %s" %
+                                     (cmd, e))
+
+    def shutdown(self):
+        if self._process is None:
+            return
+        loginf('shutdown process %s' % self._cmd)
+        self._stop_process()
+
+    def get_stdout(self, poll_interval=None):
+        sel = selectors.DefaultSelector()
+        framer = LineFramer(self._batch_max_lines, self._batch_max_age)
+        partial = {'stdout': b'', 'stderr': b''}
+        try:
+            sel.register(self._process.stdout, selectors.EVENT_READ, 'stdout')
+            sel.register(self._process.stderr, selectors.EVENT_READ, 'stderr')
+            stdout_open = True
+            while stdout_open:
+                deadline = framer.next_deadline()
+                timeout = poll_interval
+                if deadline is not None:
+                    timeout = max(0, deadline - time.time())
+                    if poll_interval is not None:
+                        timeout = min(timeout, poll_interval)
+                events = sel.select(timeout)
+                frames = []
+                if not events and deadline is None:
+                    frames.append([])
+                for (key_, _) in events:
+                    data = SelectProcManager._read(key_.fd)
+                    if data is None:
+                        continue
+                    if not data:
+                        sel.unregister(key_.fileobj)
+                        stdout_open = stdout_open and key_.data != 'stdout'
+                        batch = [partial[key_.data]]
+                        partial[key_.data] = b''
+                    else:
+                        batch = (partial[key_.data] + data).split(b'\n')
+                        partial[key_.data] = batch.pop()
+                    batch = [x for x in batch if x]
+                    if key_.data == 'stderr':
+                        self.stderr_queue.put(batch)
+                        # give the caller a chance to read the stderr
+                        frames.append([])
+                    else:
+                        frames.extend(framer.add(batch, time.time()))
+                frames.extend(framer.expire(time.time()))
+                for frame in frames:
+                    yield frame
+            # stdout is closed, so the process has exited or is exiting
+            self._process.wait()
+        finally:
+            sel.close()
+        for frame in framer.flush():
+            yield frame
+
+    @staticmethod
+    def _read(fd):
+        # read whatever is available.  return None if nothing is available.
+        try:
+            return os.read(fd, AsyncReader.CHUNK_SIZE)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return None
+            raise
+
+
+class PacketRecord(object):
+    # a parsed packet.  the observations are kept by their plain names along
+    # with the sensor_id and packet_type, instead of as a dict keyed by
+    # qualified names.  for code that expects the dict, a record acts like
+    # one whose keys are dateTime, usUnits, and a qualified name
+    #   <observation_name>.<sensor_id>.<packet_type>
+    # for each observation.  the observation names are the string literals
+    # in the parsers, so they are already interned.
+
+    __slots__ = ['packet_type', 'sensor_id', 'obs', 'dateTime', 'usUnits']
+    META = ('dateTime', 'usUnits')
+
+    def __init__(self, obs, sensor_id='', packet_type=''):
+        self.obs = obs
+        self.sensor_id = '%s' % (sensor_id,)
+        self.packet_type = '%s' % (packet_type,)
+
+    def meta_items(self):
+        # the dateTime and usUnits items that are present
+        items = []
+        for k in PacketRecord.META:
+            try:
+                items.append((k, getattr(self, k)))
+            except AttributeError:
+                pass
+        return items
+
+    def qualify(self, name):
+        return "%s.%s.%s" % (name, self.sensor_id, self.packet_type)
+
+    def _obs_name(self, key_):
+        # the observation name for a qualified name, or None
+        suffix = ".%s.%s" % (self.sensor_id, self.packet_type)
+        if key_.endswith(suffix):
+            name = key_[:-len(suffix)]
+            if name in self.obs:
+                return name
+        return None
+
+    def keys(self):
+        return [k for (k, _) in self.meta_items()] + \
+            [self.qualify(n) for n in self.obs]
+
+    def items(self):
+        return self.meta_items() + \
+            [(self.qualify(n), self.obs[n]) for n in self.obs]
+
+    def values(self):
+        return [v for (_, v) in self.items()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def copy(self):
+        record = PacketRecord(dict(self.obs), self.sensor_id, self.packet_type)
+        for (k, v) in self.meta_items():
+            setattr(record, k, v)
+        return record
+
+    def get(self, key_, default=None):
+        try:
+            return self[key_]
+        except KeyError:
+            return default
+
+    def pop(self, key_, *default):
+        try:
+            value = self[key_]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key_]
+        return value
+
+    def __getitem__(self, key_):
+        if key_ in PacketRecord.META:
+            try:
+                return getattr(self, key_)
+            except AttributeError:
+                raise KeyError(key_)
+        name = self._obs_name(key_)
+        if name is None:
+            raise KeyError(key_)
+        return self.obs[name]
+
+    def __setitem__(self, key_, value):
+        if key_ in PacketRecord.META:
+            setattr(self, key_, value)
+            return
+        name = self._obs_name(key_)
+        if name is None:
+            raise KeyError(key_)
+        self.obs[name] = value
+
+    def __delitem__(self, key_):
+        if key_ in PacketRecord.META:
+            try:
+                delattr(self, key_)
+            except AttributeError:
+                raise KeyError(key_)
+            return
+        name = self._obs_name(key_)
+        if name is None:
+            raise KeyError(key_)
+        del self.obs[name]
+
+    def __contains__(self, key_):
+        try:
+            self[key_]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.meta_items()) + len(self.obs)
+
+    def __eq__(self, other):
+        if isinstance(other, PacketRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
 
 
 class Packet:
 
+    # the rtl_433 protocol numbers (the -R option) of the decoders that emit
+    # this packet type.  an empty list means the numbers are not known.
+    PROTOCOLS = []
+
     def __init__(self):
         pass
 
@@ -271,19 +900,63 @@ class Packet:
         return None
 
     TS_PATTERN = re.compile('(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)')
+    EPOCH_PATTERN = re.compile('^\d+(\.\d+)?$')
+
+    # rtl_433 emits many packets with the same timestamp, so remember the
+    # most recent 'YYYY-mm-dd HH:MM:SS' prefix and its epoch value.
+    _last_time = (None, None)
 
     @staticmethod
     def parse_time(line):
+        # handles the '-M utc' format, optionally with fractional seconds as
+        # emitted by '-M time:usec', as well as the epoch seconds emitted by
+        # '-M time:unix'.  anything else falls back to a regex search.
         ts = None
         try:
-            m = Packet.TS_PATTERN.search(line)
-            if m:
-                utc = time.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
-                ts = timegm(utc)
+            if isinstance(line, (int, float)):
+                return line
+            ts = Packet._parse_fixed_time(line)
+            if ts is None:
+                if Packet.EPOCH_PATTERN.match(line):
+                    return float(line) if '.' in line else int(line)
+                m = Packet.TS_PATTERN.search(line)
+                if m:
+                    utc = time.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
+                    ts = timegm(utc)
         except Exception as e:
             logerr("parse timestamp failed for '%s': %s" % (line, e))
         return ts
 
+    @staticmethod
+    def _parse_fixed_time(line):
+        # parse 'YYYY-mm-dd HH:MM:SS[.ffffff]' at the start of the line
+        # without strptime.  return None if the line is not in that format.
+        prefix = line[:19]
+        if prefix == Packet._last_time[0]:
+            ts = Packet._last_time[1]
+        else:
+            if (len(prefix) != 19 or prefix[4] != '-' or prefix[7] != '-' or
+                prefix[10] not in ' T' or prefix[13] != ':' or
+                prefix[16] != ':'):
+                return None
+            fields = (prefix[0:4], prefix[5:7], prefix[8:10],
+                      prefix[11:13], prefix[14:16], prefix[17:19])
+            if not all([x.isdigit() for x in fields]):
+                return None
+            (y, mo, d, h, mi, sec) = [int(x) for x in fields]
+            if not (y >= 1 and 1 <= mo <= 12 and
+                    h <= 23 and mi <= 59 and sec <= 61):
+                return None
+            # timegm would roll an impossible date such as 2020-02-31 into
+            # the next month, so leave those to strptime.
+            if not 1 <= d <= monthrange(y, mo)[1]:
+                return None
+            ts = timegm((y, mo, d, h, mi, sec, 0, 0, 0))
+            Packet._last_time = (prefix, ts)
+        if len(line) > 20 and line[19] == '.' and line[20:].isdigit():
+            ts += float(line[19:])
+        return ts
+
     @staticmethod
     def get_float(obj, key_):
         if key_ in obj:
@@ -313,30 +986,31 @@ class Packet:
             parseinfo = dict()
         packet = dict()
         for line in lines[1:]:
-            if line.count(':') == 1:
+            idx = line.find(':')
+            if idx >= 0 and line.find(':', idx + 1) < 0:
                 try:
-                    (name, value) = [x.strip() for x in line.split(':')]
+                    name = line[:idx].strip()
+                    value = line[idx + 1:].strip()
                     if name in parseinfo:
                         if parseinfo[name][1]:
                             m = parseinfo[name][1].search(value)
                             if m:
                                 value = m.group(1)
                             else:
-                                logdbg("regex failed for %s:'%s'" %
-                                       (name, value))
+                                logdbg("regex failed for %s:'%s'",
+                                       name, value)
                         if parseinfo[name][2]:
                             value = parseinfo[name][2](value)
                         if parseinfo[name][0]:
                             name = parseinfo[name][0]
                         packet[name] = value
                     else:
-                        logdbg("ignoring %s:%s" % (name, value))
+                        logdbg("ignoring %s:%s", name, value)
                 except Exception as e:
                     logerr("parse failed for line '%s': %s" % (line, e))
             else:
-                logdbg("skip line '%s'" % line)
-        while lines:
-            lines.pop(0)
+                logdbg("skip line '%s'", line)
+        del lines[:]
         return packet
 
     @staticmethod
@@ -344,14 +1018,26 @@ class Packet:
         # qualify each field name with details about the sensor.  not every
         # sensor has all three fields.
         # observation.<sensor_id>.<packet_type>
-        packet = dict()
+        # the qualified names are produced only when something asks for them,
+        # see PacketRecord.
+        record = PacketRecord(pkt, sensor_id, packet_type)
         if 'dateTime' in pkt:
-            packet['dateTime'] = pkt.pop('dateTime', 0)
+            record.dateTime = pkt.pop('dateTime', 0)
         if 'usUnits' in pkt:
-            packet['usUnits'] = pkt.pop('usUnits', 0)
-        for n in pkt:
-            packet["%s.%s.%s" % (n, sensor_id, packet_type)] = pkt[n]
-        return packet
+            record.usUnits = pkt.pop('usUnits', 0)
+        return record
+
+    @staticmethod
+    def sensor_of(pkt):
+        # the (packet_type, sensor_id) from the qualified field names of a
+        # packet, or None if there are none
+        if isinstance(pkt, PacketRecord):
+            return pkt.packet_type, pkt.sensor_id
+        for k in pkt:
+            kparts = k.split('.')
+            if len(kparts) == 3:
+                return kparts[2], kparts[1]
+        return None
 
 
 class Acurite(object):
@@ -375,6 +1061,7 @@ class AcuriteAtlasPacket(Packet):
     #   39: wind_avg_mi_h, uv, lux
 
     IDENTIFIER = "Acurite-Atlas"
+    PROTOCOLS = [40]
 
     @staticmethod
     def parse_json(obj):
@@ -407,6 +1094,7 @@ class AcuriteAtlasPacket(Packet):
 class AcuriteTowerPacketV2(Packet):
     # Based on AcuriteTowerPacket type, but implemented for unsupported format
     IDENTIFIER = "Acurite-Tower"
+    PROTOCOLS = [40]
     # Sample data:
     # {"time" : "2019-07-29 07:44:23.005624", "protocol" : 40, "model" : "Acurite-Tower", "id" : 1234, "sensor_id" : 1234, "channel" : "A", "temperature_C" : 22.600, "humidity" : 45, "battery_ok" : 0, "mod" : "ASK", "freq" : 433.938, "rssi" : -0.134, "snr" : 14.391, "noise" : -14.525}
 
@@ -434,6 +1122,7 @@ class AcuriteTowerPacketV2(Packet):
 class Acurite5n1PacketV2(Packet):
     # Based on Acurite5n1Packet class, but implemented for unsupported format
     IDENTIFIER = "Acurite-5n1"
+    PROTOCOLS = [40]
     # sample json output from rtl_433
     # {"time" : "2019-07-29 07:46:22.482883", "protocol" : 40, "model" : "Acurite-5n1", "id" : 1234, "channel" : "B", "sequence_num" : 1, "battery_ok" : 1, "message_type" : 56, "wind_avg_km_h" : 0.000, "temperature_C" : 20.500, "humidity" : 93, "mod" : "ASK", "freq" : 433.934, "rssi" : -1.719, "snr" : 24.404, "noise" : -26.124}
     # {"time" : "2020-02-05 02:20:54", "model" : "Acurite-5n1", "subtype" : 56, "id" : 956, "channel" : "A", "sequence_num" : 2, "battery_ok" : 1, "wind_avg_km_h" : 3.483, "temperature_F" : 31.300, "humidity" : 66}
@@ -499,6 +1188,7 @@ class AcuriteTowerPacket(Packet):
     # : 68
 
     IDENTIFIER = "Acurite tower sensor"
+    PROTOCOLS = [40]
     PATTERN = re.compile('0x([0-9a-fA-F]+) Ch ([A-C]): ([\d.-]+) C ([\d.-]+) F ([\d]+) % RH')
 
     @staticmethod
@@ -558,6 +1248,7 @@ class Acurite5n1Packet(Packet):
     # counter, so try to deal with the variants we have seen.
 
     IDENTIFIER = "Acurite 5n1 sensor"
+    PROTOCOLS = [40]
     PATTERN = re.compile('0x([0-9a-fA-F]+) Ch ([A-C]), (.*)')
     RAIN = re.compile('Total rain fall since last reset: ([\d.]+)')
     MSG = re.compile('Msg (\d+), (.*)')
@@ -677,6 +1368,7 @@ class Acurite606TXPacket(Packet):
     # {"time" : "2017-03-04 16:18:12", "model" : "Acurite 606TX Sensor", "id" : 48, "battery" : "OK", "temperature_C" : -1.100}
 
     IDENTIFIER = "Acurite 606TX Sensor"
+    PROTOCOLS = [55]
 
     @staticmethod
     def parse_json(obj):
@@ -697,6 +1389,7 @@ class AcuriteRain899Packet(Packet):
     # {"time" : "2019-12-05 16:32:20", "model" : "Acurite-Rain899", "id" : 1699, "channel" : 0, "battery_ok" : 0, "rain_mm" : 6.096}
 
     IDENTIFIER = "Acurite-Rain899"
+    PROTOCOLS = [40]
 
     @staticmethod
     def parse_json(obj):
@@ -728,6 +1421,7 @@ class Acurite986Packet(Packet):
     # IDENTIFIER = "Acurite 986 sensor"
     # IDENTIFIER = "Acurite 986 Sensor"
     IDENTIFIER = "Acurite 986"
+    PROTOCOLS = [41]
     PATTERN = re.compile('0x([0-9a-fA-F]+) - (1R|2F): ([\d.-]+) C ([\d.-]+) F')
 
     @staticmethod
@@ -778,6 +1472,7 @@ class AcuriteLightningPacket(Packet):
 
 #    IDENTIFIER = "Acurite lightning"
     IDENTIFIER = "Acurite Lightning 6045M"
+    PROTOCOLS = [40]
     PATTERN = re.compile('0x([0-9a-fA-F]+) Ch (.) Msg Type 0x([0-9a-fA-F]+): ([\d.-]+) ([CF]) ([\d.]+) % RH Strikes ([\d]+) Distance ([\d.]+)')
 
     @staticmethod
@@ -824,6 +1519,7 @@ class AcuriteLightningPacket(Packet):
 
 class Acurite00275MPacket(Packet):
     IDENTIFIER = "00275rm"
+    PROTOCOLS = [74]
 
     # {"time" : "2017-03-09 21:59:11", "model" : "00275rm", "probe" : 2, "id" : 3942, "battery" : "OK", "temperature_C" : 23.300, "humidity" : 34, "ptemperature_C" : 22.700, "crc" : "ok"}
 
@@ -843,6 +1539,7 @@ class Acurite00275MPacket(Packet):
 
 class AcuriteWT450Packet(Packet):
     IDENTIFIER = "WT450 sensor"
+    PROTOCOLS = [33]
 
     # {"time" : "2017-09-14 20:24:43", "model" : "WT450 sensor", "id" : 1, "channel" : 2, "battery" : "OK", "temperature_C" : 25.090, "humidity" : 49}
     # {"time" : "2017-09-14 20:24:44", "model" : "WT450 sensor", "id" : 1, "channel" : 2, "battery" : "OK", "temperature_C" : 25.110, "humidity" : 49}
@@ -866,6 +1563,7 @@ class AlectoV1TemperaturePacket(Packet):
     # {"time" : "2018-08-29 17:07:34", "model" : "AlectoV1 Temperature Sensor", "id" : 88, "channel" : 2, "battery" : "OK", "temperature_C" : 27.700, "humidity" : 42, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "AlectoV1 Temperature Sensor"
+    PROTOCOLS = [16]
 
     @staticmethod
     def parse_json(obj):
@@ -883,6 +1581,7 @@ class AlectoV1WindPacket(Packet):
     # {"time" : "2019-01-20 11:14:00", "model" : "AlectoV1 Wind Sensor", "id" : 7, "channel" : 0, "battery" : "OK", "wind_speed" : 0.000, "wind_gust" : 0.000, "wind_direction" : 270, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "AlectoV1 Wind Sensor"
+    PROTOCOLS = [16]
 
     @staticmethod
     def parse_json(obj):
@@ -903,6 +1602,7 @@ class AlectoV1RainPacket(Packet):
     # {"time" : "2019-01-20 15:29:21", "model" : "AlectoV1 Rain Sensor", "id" : 13, "channel" : 0, "battery" : "OK", "rain_total" : 15.500, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "AlectoV1 Rain Sensor"
+    PROTOCOLS = [16]
 
     @staticmethod
     def parse_json(obj):
@@ -926,6 +1626,7 @@ class AmbientF007THPacket(Packet):
 
 #    IDENTIFIER = "Ambient Weather F007TH Thermo-Hygrometer"
     IDENTIFIER = "Ambientweather-F007TH"
+    PROTOCOLS = [20]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -970,6 +1671,7 @@ class AmbientWH31EPacket(Packet):
     # {"time" : "2019-02-14 17:24:41.259441", "protocol" : 113, "model" : "AmbientWeather-WH31E", "id" : 24, "channel" : 1, "battery" : "OK", "temperature_C" : 6.000, "humidity" : 42, "data" :"2f00000000", "mic" : "CRC", "mod" : "FSK", "freq1" : 914.984, "freq2" : 914.906, "rssi" : -13.328, "snr" : 13.197, "noise" : -26.525}
 
     IDENTIFIER = "AmbientWeather-WH31E"
+    PROTOCOLS = [113]
 
     @staticmethod
     def parse_json(obj):
@@ -1005,6 +1707,7 @@ class CalibeurRF104Packet(Packet):
     # Humidity: 71 %
 
     IDENTIFIER = "Calibeur RF-104"
+    PROTOCOLS = [21]
     PARSEINFO = {
         'ID': ['id', None, lambda x: int(x)],
         'Temperature': [
@@ -1030,6 +1733,7 @@ class EcoWittWH40Packet(Packet):
     # {"time" : "2020-02-05 12:37:05", "model" : "EcoWitt-WH40", "id" : 52591, "rain_mm" : 0.800, "data" : "0002ed0000", "mic" : "CRC"}
 
     IDENTIFIER = "EcoWitt-WH40"
+    PROTOCOLS = [113]
 
     @staticmethod
     def parse_json(obj):
@@ -1065,6 +1769,7 @@ class FOWH1080Packet(Packet):
     # this assumes wind speed is kph
 
     IDENTIFIER = "Fine Offset WH1080 weather station"
+    PROTOCOLS = [32]
     PARSEINFO = {
 #        'Msg type': ['msg_type', None, None],
         'StationID': ['station_id', None, None],
@@ -1135,6 +1840,8 @@ class FOWHx080Packet(Packet):
     # Month: 25
     # Day: 70
 
+    # {"time" : "2017-05-15 11:58:31", "model" : "Fine Offset Electronics WH1080/WH3080 Weather Station", "msg_type" : 0, "id" : 236, "temperature_C" : 23.900, "humidity" : 48, "direction_str" : "NE", "direction_deg" : "45", "speed" : 1.220, "gust" : 2.450, "rain" : 525.300, "battery" : "OK"}
+
     # apparently there are different identifiers for the same packet, depending
     # on which version of rtl_433 is running.  one version has extra spaces,
     # while another version does not.  so for now, and until rtl_433
@@ -1147,6 +1854,7 @@ class FOWHx080Packet(Packet):
     #IDENTIFIER = "Fine Offset Electronics WH1080 / WH3080 Weather Station"
     #IDENTIFIER = "Fine Offset Electronics WH1080/WH3080 Weather Station"
     IDENTIFIER = "Fine Offset Electronics WH1080"
+    PROTOCOLS = [32, 155]
 
     @staticmethod
     def parse_json(obj):
@@ -1197,6 +1905,7 @@ class FOWH3080Packet(Packet):
     # {"time" : "2017-05-15 17:21:07", "model" : "Fine Offset Electronics WH3080 Weather Station", "msg_type" : 2, "uv_sensor_id" : 225, "uv_status" : "OK", "uv_index" : 1, "lux" : 7837.000, "wm" : 11.474, "fc" : 728.346}
 
     IDENTIFIER = "Fine Offset Electronics WH3080 Weather Station"
+    PROTOCOLS = [32, 155]
 
     @staticmethod
     def parse_json(obj):
@@ -1225,6 +1934,7 @@ class FOWH24Packet(Packet):
     # {"time" : "2019-02-11 03:44:48", "model" : "Fine Offset WH24", "id" : 140, "temperature_C" : 12.600, "humidity" : 80, "wind_dir_deg" : 109, "wind_speed_ms" : 0.980, "gust_speed_ms" : 1.120, "rainfall_mm" : 1150.800, "uv" : 1, "uvi" : 0, "light_lux" : 0.000, "battery" : "OK", "mic" : "CRC"}
 
     IDENTIFIER = "Fine Offset WH24"
+    PROTOCOLS = [78]
 
     @staticmethod
     def parse_json(obj):
@@ -1267,6 +1977,7 @@ class FOWH25Packet(Packet):
     # {"time" : "2017-03-25 05:33:57", "model" : "Fine Offset Electronics, WH25", "id" : 239, "temperature_C" : 30.200, "humidity" : 68, "pressure" : 1008.000}
     # {"time" : "2018-10-10 13:37:11", "model" : "Fine Offset Electronics, WH25", "id" : 21, "temperature_C" : 21.600, "humidity" : 66, "pressure_hPa" : 972.800, "battery" : "OK", "mic" : "CHECKSUM"}
     IDENTIFIER = "Fine Offset Electronics, WH25"
+    PROTOCOLS = [78]
     PARSEINFO = {
         'ID': ['station_id', None, lambda x: int(x)],
         'Temperature':
@@ -1305,6 +2016,7 @@ class FOWH2Packet(Packet):
     # {"time" : "2018-08-29 17:08:33", "model" : "Fine Offset Electronics, WH2 Temperature/Humidity sensor", "id" : 129, "temperature_C" : 24.200, "mic" : "CRC"}
 
     IDENTIFIER = "Fine Offset Electronics, WH2"
+    PROTOCOLS = [18]
     PARSEINFO = {
         'ID': ['station_id', None, lambda x: int(x)],
         'Temperature':
@@ -1350,6 +2062,7 @@ class FOWH32BPacket(Packet):
     # {"time" : "2019-04-08 07:06:03", "model" : "Fineoffset-WH32B", "id" : 146, "temperature_C" : 16.900, "humidity" : 59, "pressure_hPa" : 1001.300, "battery" : "OK", "mic" : "CHECKSUM"}
 
     IDENTIFIER = "Fineoffset-WH32B"
+    PROTOCOLS = [78]
 
     @staticmethod
     def parse_json(obj):
@@ -1373,6 +2086,7 @@ class FOWH5Packet(Packet):
     # {"time" : "2019-10-27 14:51:21", "model" : "Fine Offset WH5 sensor", "id" : 48, "temperature_C" : 11.700, "humidity" : 62, "mic" : "CRC"}
 
     IDENTIFIER = "Fine Offset WH5 sensor"
+    PROTOCOLS = [18]
     PARSEINFO = {
         'ID': ['station_id', None, lambda x: int(x)],
         'Temperature': ['temperature', re.compile('([\d.-]+) C'), lambda x: float(x)]
@@ -1422,6 +2136,7 @@ class FOWH65BPacket(Packet):
 
     # {"time" : "2018-10-10 13:37:02", "model" : "Fine Offset WH65B", "id" : 89, "temperature_C" : 17.600, "humidity" : 93, "wind_dir_deg" : 224, "wind_speed_ms" : 1.540, "gust_speed_ms" : 2.240, "rainfall_mm" : 325.500, "uv" : 130, "uvi" : 0, "light_lux" : 13454.000, "battery" : "OK", "mic" : "CRC"}
     IDENTIFIER = "Fine Offset WH65B"
+    PROTOCOLS = [78]
 
     @staticmethod
     def parse_json(obj):
@@ -1452,6 +2167,9 @@ class FOWH0290Packet(Packet):
     #{"time" : "@0.084044s", "model" : "Fine Offset Electronics, WH0290", "id" : 204, "pm2_5_ug_m3" : 9, "pm10_0_ug_m3" : 10, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "Fine Offset Electronics, WH0290"
+    # rtl_433 has no decoder of its own for the WH0290.  the WH25 decoder
+    # hands it any message of the WH0290 length.
+    PROTOCOLS = [78]
 
     @staticmethod
     def parse_json(obj):
@@ -1489,6 +2207,7 @@ class HidekiTS04Packet(Packet):
     # {"time" : "2016-11-04 14:44:37", "model" : "HIDEKI TS04 sensor", "rc" : 9, "channel" : 1, "battery" : "OK", "temperature_C" : 12.400, "humidity" : 61}
 
     IDENTIFIER = "HIDEKI TS04 sensor"
+    PROTOCOLS = [42]
     PARSEINFO = {
         'Rolling Code': ['rolling_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1531,6 +2250,7 @@ class HidekiWindPacket(Packet):
     # {"time" : "2019-11-24 19:13:41", "model" : "HIDEKI Wind sensor", "rc" : 3, "channel" : 4, "battery" : "OK", "temperature_C" : 11.000, "wind_speed_mph" : 1.300, "gust_speed_mph" : 0.100, "wind_approach" : 1, "wind_direction" : 270.000, "mic" : "CRC"}
 
     IDENTIFIER = "HIDEKI Wind sensor"
+    PROTOCOLS = [42]
     PARSEINFO = {
         'Rolling Code': ['rolling_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1587,6 +2307,7 @@ class HidekiRainPacket(Packet):
     # {"time" : "2019-11-24 19:13:52", "model" : "HIDEKI Rain sensor", "rc" : 0, "channel" : 4, "battery" : "OK", "rain_mm" : 274.400, "mic" : "CRC"}
     
     IDENTIFIER = "HIDEKI Rain sensor"
+    PROTOCOLS = [42]
     PARSEINFO = {
         'Rolling Code': ['rolling_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1620,6 +2341,7 @@ class HolmanWS5029Packet(Packet):
     # {"time" : "2019-08-07 10:35:07", "model" : "Holman Industries WS5029 weather station", "id" : 53761, "temperature_C" : 9.100, "humidity" : 102, "rain_mm" : 39.500, "wind_avg_km_h" : 0, "direction_deg" : 338}
 
     IDENTIFIER = "Holman Industries WS5029 weather station"
+    PROTOCOLS = [134, 143]
 
     @staticmethod
     def parse_json(obj):
@@ -1656,6 +2378,7 @@ class LaCrosseWSPacket(Packet):
     # {"time" : "2016-11-04 14:49:16", "model" : "LaCrosse WS", "ws_id" : 9, "id" : 202, "wind_speed_ms" : 0.800, "wind_direction" : 270.000}
 
     IDENTIFIER = "LaCrosse WS"
+    PROTOCOLS = [34]
     PARSEINFO = {
         'Wind speed': [
             'wind_speed', re.compile('([\d.]+) m/s'), lambda x: float(x)],
@@ -1711,6 +2434,7 @@ class LaCrosseTX141THBv2Packet(Packet):
     # {"time" : "2017-01-16 15:24:43", "temperature" : 54.140, "humidity" : 34, "id" : 221, "model" : "LaCrosse TX141TH-Bv2 sensor", "battery" : "OK", "test" : "Yes"}
 
     IDENTIFIER = "LaCrosse TX141TH-Bv2 sensor"
+    PROTOCOLS = [73]
 
     @staticmethod
     def parse_json(obj):
@@ -1731,6 +2455,7 @@ class LaCrosseTXPacket(Packet):
     # {"time" : "2017-07-30 21:11:19", "model" : "LaCrosse TX Sensor", "id" : 127, "temperature_C" : 27.100}
 
     IDENTIFIER = "LaCrosse TX Sensor"
+    PROTOCOLS = [8]
 
     @staticmethod
     def parse_json(obj):
@@ -1753,6 +2478,7 @@ class RubicsonTempPacket(Packet):
     # CRC: OK
 
     IDENTIFIER = "Rubicson Temperature Sensor"
+    PROTOCOLS = [2]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1803,6 +2529,7 @@ class OSPCR800Packet(Packet):
     # Total Rain: 41.0 in
 
     IDENTIFIER = "PCR800"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1847,6 +2574,7 @@ class OSBTHR968Packet(Packet):
     # Pressure:        1012 mbar
 
     IDENTIFIER = "BHTR968"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1894,6 +2622,7 @@ class OSTHGR122NPacket(Packet):
     # Humidity:        36 %
 
     IDENTIFIER = "THGR122N"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1945,6 +2674,7 @@ class OSTHGR810Packet(Packet):
     # Humidity: 57 %
 
     IDENTIFIER = "THGR810"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -1986,6 +2716,7 @@ class OSTHR128Packet(Packet):
     # Temperature:     18.800 C
 
     IDENTIFIER = "OSv1 Temperature Sensor"
+    PROTOCOLS = [50]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2022,6 +2753,7 @@ class OSTHR228NPacket(Packet):
     # Temperature:     24.70 C
 
     IDENTIFIER = "Thermo Sensor THR228N"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2046,6 +2778,7 @@ class OSUV800Packet(Packet):
     # UV Index: 0
 
     IDENTIFIER = "UV800"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2082,6 +2815,7 @@ class OSUVR128Packet(Packet):
     # Battery: OK
 
     IDENTIFIER = "Oregon Scientific UVR128"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'UV Index': ['uv_index', re.compile('([\d.-]+) C'), lambda x: float(x)],
@@ -2119,6 +2853,7 @@ class OSWGR800Packet(Packet):
     # Direction: 22.5 degrees
 
     IDENTIFIER = "WGR800"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2161,6 +2896,7 @@ class OSTHN802Packet(Packet):
     # Celcius:         26.60 C
 
     IDENTIFIER = "THN802"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2199,6 +2935,7 @@ class OSBTHGN129Packet(Packet):
     # Pressure:        959.36 mPa
 
     IDENTIFIER = "BTHGN129"
+    PROTOCOLS = [12]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2234,6 +2971,7 @@ class OSBTHGN129Packet(Packet):
 class OSTHGR968Packet(Packet):
 
     IDENTIFIER = "THGR968"
+    PROTOCOLS = [12]
 
     # {"time" : "2019-02-15 13:43:25", "brand" : "OS", "model" : "THGR968", "id" : 187, "channel" : 1, "battery" : "OK", "temperature_C" : 16.500, "humidity" : 11}
     # '{"time" : "2019-02-15 13:43:26", "brand" : "OS", "model" : "THGR968", "id" : 187, "channel" : 1, "battery" : "OK", "temperature_C" : 16.500, "humidity" : 11}
@@ -2254,6 +2992,7 @@ class OSTHGR968Packet(Packet):
 class OSRGR968Packet(Packet):
 
     IDENTIFIER = "RGR968"
+    PROTOCOLS = [12]
 
     # {"time" : "2019-02-15 14:32:51", "brand" : "OS", "model" : "RGR968", "id" : 48, "channel" : 0, "battery" : "OK", "rain_rate" : 0.000, "total_rain" : 6935.100}
     # {"time" : "2019-02-15 14:32:51", "brand" : "OS", "model" : "RGR968", "id" : 48, "channel" : 0, "battery" : "OK", "rain_rate" : 0.000, "total_rain" : 6935.100}
@@ -2276,6 +3015,7 @@ class ProloguePacket(Packet):
     # {"time" : "2017-03-15 20:14:19", "model" : "Prologue sensor", "id" : 5, "rid" : 166, "channel" : 1, "battery" : "OK", "button" : 0, "temperature_C" : -0.700, "humidity" : 49}
 
     IDENTIFIER = "Prologue sensor"
+    PROTOCOLS = [3]
 
     @staticmethod
     def parse_json(obj):
@@ -2305,6 +3045,7 @@ class NexusTemperaturePacket(Packet):
     #    Humidity:        42 %
 
     IDENTIFIER = "Nexus Temperature"
+    PROTOCOLS = [19]
     PARSEINFO = {
         'House Code': ['house_code', None, lambda x: int(x)],
         'Battery': ['battery', None, lambda x: 0 if x == 'OK' else 1],
@@ -2356,6 +3097,7 @@ class Bresser5in1Packet(Packet):
     # "mic" : "CHECKSUM"}#012
 
     IDENTIFIER = "Bresser-5in1"
+    PROTOCOLS = [119]
 
     @staticmethod
     def parse_json(obj):
@@ -2390,6 +3132,7 @@ class SpringfieldTMPacket(Packet):
     # {"time" : "2019-01-20 11:14:00", "model" : "Springfield Temperature & Moisture", "sid" : 224, "channel" : 3, "battery" : "OK", "transmit" : "MANUAL", "temperature_C" : -204.800, "moisture" : 0, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "Springfield Temperature & Moisture"
+    PROTOCOLS = [53]
 
     @staticmethod
     def parse_json(obj):
@@ -2416,6 +3159,7 @@ class TFATwinPlus303049Packet(Packet):
     # {"time" : "2019-09-25 17:15:12", "model" : "TFA-Twin-Plus-30.3049", "id" : 13, "channel" : 1, "battery" : "OK", "temperature_C" : 8.400, "humidity" : 91, "mic" : "CHECK  SUM"} 
 
     IDENTIFIER = "TFA-Twin-Plus-30.3049"
+    PROTOCOLS = [31]
     PARSEINFO = {
         'Rolling Code': ['rolling_code', None, lambda x: int(x)],
         'Channel': ['channel', None, lambda x: int(x)],
@@ -2453,6 +3197,7 @@ class TSFT002Packet(Packet):
     # {"time" : "2019-12-22 22:54:58", "model" : "TS-FT002", "id" : 127, "depth_cm" : 186, "temperature_C" : 20.700, "transmit_s" : 180, "flags" : 8, "mic" : "CHECKSUM"}
 
     IDENTIFIER = "TS-FT002"
+    PROTOCOLS = [125]
 
     @staticmethod
     def parse_json(obj):
@@ -2473,6 +3218,7 @@ class WT0124Packet(Packet):
     # {"time" : "2019-04-23 12:28:52", "model" : "WT0124 Pool Thermometer", "rid" : 122, "channel" : 1, "temperature_C" : 22.800, "mic" : "CHECKSUM", "data" : 172}
 
     IDENTIFIER = "WT0124 Pool Thermometer"
+    PROTOCOLS = [109]
 
     @staticmethod
     def parse_json(obj):
@@ -2485,6 +3231,149 @@ class WT0124Packet(Packet):
         return pkt
 
 
+class JsonDecoder(object):
+    # decode json lines using the fastest decoder that is installed, or the
+    # decoder named in the configuration.  lines may be bytes or unicode.
+    # a decoder other than the standard library must decode the sample lines
+    # exactly as the standard library does, otherwise it is not used.  this
+    # is only a cheap guard against a broken install; the tests compare each
+    # decoder with the standard library over the whole sample corpus.
+
+    DECODERS = ['orjson', 'simdjson', 'ujson', 'json']
+    SAMPLES = [
+        b'{"time" : "2019-12-14 16:56:57", "model" : "Acurite-Atlas", "id" : 896, "channel" : "A", "sequence_num" : 0, "battery_ok" : 1, "message_type" : 37, "wind_avg_mi_h" : 5.000, "temperature_F" : 40.000, "humidity" : 76}',
+        b'{"time" : "2019-12-22 16:57:58", "model" : "Fineoffset-WH32B", "id" : 146, "battery" : "OK", "temperature_C" : -1.700, "humidity" : 39, "pressure_hPa" : 1006.500, "mic" : "CHECKSUM"}',
+        b'{"time" : "2020-01-01 00:00:00.123456", "model" : "Acurite-5n1", "subtype" : 49, "id" : 1234, "channel" : "C", "sequence_num" : 2, "battery_ok" : 1, "wind_avg_km_h" : 1.0e+01, "wind_dir_deg" : 157.5, "rain_in" : 0.000, "codes" : [1, 2], "note" : "caf\\u00e9"}',
+        ]
+
+    def __init__(self, name='auto'):
+        self.name = None
+        self.loads = None
+        if name == 'auto':
+            candidates = JsonDecoder.DECODERS
+        elif name in JsonDecoder.DECODERS:
+            candidates = [name, 'json']
+        else:
+            raise weewx.ViolatedPrecondition(
+                "unknown json decoder '%s'" % name)
+        for candidate in candidates:
+            try:
+                loads = JsonDecoder._get_loads(candidate)
+            except ImportError:
+                logdbg("json decoder %s is not installed" % candidate)
+                continue
+            if candidate == 'json' or JsonDecoder._conforms(loads):
+                self.name = candidate
+                self.loads = loads
+                break
+            loginf("json decoder %s does not match the standard library"
+                   " json decoder" % candidate)
+
+    @staticmethod
+    def _get_loads(name):
+        # return a function that decodes bytes or unicode with the named
+        # decoder.  raise ImportError if the decoder is not installed.
+        if name == 'orjson':
+            import orjson
+            return orjson.loads
+        if name == 'simdjson':
+            import simdjson
+            return simdjson.loads
+        if name == 'ujson':
+            import ujson
+            return ujson.loads
+        try:
+            json.loads(b'{}')
+            return json.loads
+        except TypeError:
+            # json before Python 3.6 decodes only unicode
+            def loads(line):
+                if isinstance(line, bytes):
+                    line = line.decode()
+                return json.loads(line)
+            return loads
+
+    @staticmethod
+    def _conforms(loads):
+        import json as stdjson
+        try:
+            for line in JsonDecoder.SAMPLES:
+                if not JsonDecoder.same(
+                        loads(line), stdjson.loads(line.decode())):
+                    return False
+        except (ValueError, TypeError):
+            return False
+        return True
+
+    @staticmethod
+    def same(a, b):
+        # whether two decoded values are equal and have the same types, so
+        # that 10 and 10.0 are different
+        if type(a) != type(b):
+            return False
+        if isinstance(a, dict):
+            return sorted(a) == sorted(b) and all(
+                [JsonDecoder.same(a[k], b[k]) for k in a])
+        if isinstance(a, list):
+            return len(a) == len(b) and all(
+                [JsonDecoder.same(x, y) for (x, y) in zip(a, b)])
+        return a == b
+
+
+class RepeatCache(object):
+    # remember the result of parsing each json line for window seconds.  the
+    # key is the line with its time field removed, so a repeat of the same
+    # transmission is found even when rtl_433 reports it in the next second.
+    # the cached packet is given the time of the repeat.
+
+    TIME_PATTERN = re.compile('"time"\\s*:\\s*("[^"]*"|[^,}]*),?')
+    TIME_PATTERN_BYTES = re.compile(b'"time"\\s*:\\s*("[^"]*"|[^,}]*),?')
+
+    def __init__(self, window=2, max_lines=64):
+        self.window = window
+        self.max_lines = max_lines
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _split_time(line):
+        # return the line without the time field, and the time field value
+        if isinstance(line, bytes):
+            m = RepeatCache.TIME_PATTERN_BYTES.search(line)
+        else:
+            m = RepeatCache.TIME_PATTERN.search(line)
+        if not m:
+            return line, None
+        value = m.group(1)
+        if isinstance(value, bytes):
+            value = value.decode()
+        value = value.strip().strip('"')
+        return line[:m.start()] + line[m.end():], value
+
+    def lookup(self, line):
+        # return (True, packet) for a repeat, (False, None) otherwise
+        (key_, value) = RepeatCache._split_time(line)
+        entry = self._entries.get(key_)
+        if entry is None or time.time() - entry[0] > self.window:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        if entry[1] is None:
+            return True, None
+        pkt = entry[1].copy()
+        if 'dateTime' in pkt and value is not None:
+            pkt['dateTime'] = Packet.parse_time(value)
+        return True, pkt
+
+    def store(self, line, pkt):
+        (key_, _) = RepeatCache._split_time(line)
+        self._entries.pop(key_, None)
+        self._entries[key_] = (time.time(), pkt.copy() if pkt else pkt)
+        while len(self._entries) > self.max_lines:
+            self._entries.popitem(last=False)
+
+
 class PacketFactory(object):
 
     # FIXME: do this with class introspection
@@ -2547,50 +3436,171 @@ class PacketFactory(object):
         WT0124Packet,
         ]
 
+    # the dispatch index is built from KNOWN_PACKETS by build_dispatch.  a
+    # model that is identical to an identifier is a single dict lookup.  any
+    # other model, and the payload of a plain text packet, is searched for
+    # the identifiers in a single pass using one regular expression built
+    # from a trie of the identifiers.  the identifier found first in the
+    # string wins.  where identifiers overlap at the same position, the
+    # longest wins, so the most specific identifier is used when one
+    # identifier contains another (e.g., WH2 and WH25).  where two parsers
+    # have the same identifier, the first in KNOWN_PACKETS wins.  the result
+    # for each model, including 'no parser', is cached.
+    MAX_CACHED_MODELS = 1000
+    _exact_models = dict()
+    _parsers_by_type = dict()
+    _identifier_pattern = None
+    _model_cache = dict()
+
+    # results of parsing recent json lines, or None to parse every line
+    repeat_cache = RepeatCache()
+
+    # the json decoder.  it is chosen when it is first needed, unless the
+    # driver or the command line has already chosen one.
+    json_decoder = None
+
+    # what rtl_433 reports about the radio, or None to ignore it
+    radio_stats = None
+
+    # counters for parse failures and unknown models, or None
+    metrics = None
+
+    @staticmethod
+    def build_dispatch():
+        exact = dict()
+        for parser in PacketFactory.KNOWN_PACKETS:
+            exact.setdefault(parser.IDENTIFIER, parser)
+        PacketFactory._exact_models = exact
+        PacketFactory._identifier_pattern = re.compile(
+            PacketFactory._trie_pattern(sorted(exact)))
+        PacketFactory._model_cache = dict()
+        PacketFactory._parsers_by_type = dict(
+            (x.__name__, x) for x in PacketFactory.KNOWN_PACKETS)
+
+    @staticmethod
+    def _trie_pattern(words):
+        # a regular expression that matches any of the words.  at each
+        # position it tries the longer words first.
+        trie = dict()
+        for w in words:
+            node = trie
+            for c in w:
+                node = node.setdefault(c, dict())
+            node[''] = True
+
+        def build(node):
+            alts = [re.escape(c) + build(node[c])
+                    for c in sorted(node) if c]
+            if not alts:
+                return ''
+            pattern = alts[0] if len(alts) == 1 else '(?:%s)' % '|'.join(alts)
+            if '' in node:
+                pattern = '(?:%s)?' % pattern
+            return pattern
+
+        return build(trie)
+
+    @staticmethod
+    def find_parser(text):
+        # return the parser whose identifier is in the string, or None
+        m = PacketFactory._identifier_pattern.search(text)
+        if m:
+            return PacketFactory._exact_models[m.group(0)]
+        return None
+
+    @staticmethod
+    def protocols_for(packet_types):
+        # return a sorted list of the rtl_433 protocol numbers needed for the
+        # specified packet types, or None if they are not known for a type.
+        protocols = set()
+        for name in packet_types:
+            parser = PacketFactory._parsers_by_type.get(name)
+            if parser is None or not parser.PROTOCOLS:
+                return None
+            protocols.update(parser.PROTOCOLS)
+        return sorted(protocols)
+
+    @staticmethod
+    def lookup_parser(model):
+        # return the parser for the specified model, or None if no parser
+        # recognizes the model.
+        try:
+            return PacketFactory._model_cache[model]
+        except KeyError:
+            pass
+        parser = PacketFactory._exact_models.get(model)
+        if parser is None:
+            parser = PacketFactory.find_parser(model)
+        if len(PacketFactory._model_cache) >= PacketFactory.MAX_CACHED_MODELS:
+            PacketFactory._model_cache.clear()
+        PacketFactory._model_cache[model] = parser
+        return parser
+
     @staticmethod
     def create(lines):
-        # return a list of packets from the specified lines
-        logdbg("lines=%s" % lines)
-        while lines:
-            pkt = None
-            if lines[0].startswith('{'):
-                pkt = PacketFactory.parse_json(lines)
+        # return a list of packets from the specified lines.  the lines are
+        # consumed.
+        logdbg("lines=%s", lines)
+        text = None
+        for line in lines:
+            if line[:1] in ('{', b'{'):
+                if text is not None:
+                    for pkt in text.flush():
+                        yield pkt
+                pkt = PacketFactory.parse_json([line])
                 if pkt is None:
-                    logdbg("punt unrecognized line '%s'" % lines[0])
-                lines.pop(0)
+                    logdbg("punt unrecognized line '%s'", line)
+                else:
+                    yield pkt
             else:
-                pkt = PacketFactory.parse_text(lines)
-            if pkt is not None:
+                if text is None:
+                    text = TextParser()
+                for pkt in text.feed(line):
+                    yield pkt
+        if text is not None:
+            for pkt in text.flush():
                 yield pkt
+        del lines[:]
 
     @staticmethod
     def parse_json(lines):
+        # repeated transmissions are usually identical lines except for the
+        # time, so reuse the result of parsing a recent identical line.
+        cache = PacketFactory.repeat_cache
+        if cache is not None:
+            (hit, pkt) = cache.lookup(lines[0])
+            if hit:
+                return pkt
+        pkt = PacketFactory._parse_json(lines)
+        if cache is not None:
+            cache.store(lines[0], pkt)
+        return pkt
+
+    @staticmethod
+    def _parse_json(lines):
+        decoder = PacketFactory.json_decoder
+        if decoder is None:
+            decoder = PacketFactory.json_decoder = JsonDecoder()
         try:
-            obj = json.loads(lines[0])
+            obj = decoder.loads(lines[0])
+            stats = PacketFactory.radio_stats
             if 'model' in obj:
-                for parser in PacketFactory.KNOWN_PACKETS:
-                    if obj['model'].find(parser.IDENTIFIER) >= 0:
-                        return parser.parse_json(obj)
-                logdbg("parse_json: unknown model %s" % obj['model'])
+                if stats is not None and 'rssi' in obj:
+                    stats.add_levels(obj)
+                parser = PacketFactory.lookup_parser(obj['model'])
+                if parser is not None:
+                    return parser.parse_json(obj)
+                logdbg("parse_json: unknown model %s", obj['model'])
+                if PacketFactory.metrics is not None:
+                    PacketFactory.metrics.inc(
+                        'unknown_models_total', labels=(('format', 'json'),))
+            elif stats is not None and 'frames' in obj:
+                stats.add_report(obj)
         except ValueError as e:
-            logdbg("parse_json failed: %s" % e)
-        return None
-
-    @staticmethod
-    def parse_text(lines):
-        ts, payload = PacketFactory.parse_firstline(lines[0])
-        if ts and payload:
-            logdbg("parse_text: ts=%s payload=%s" % (ts, payload))
-            for parser in PacketFactory.KNOWN_PACKETS:
-                if payload.find(parser.IDENTIFIER) >= 0:
-                    pkt = parser.parse_text(ts, payload, lines)
-                    logdbg("pkt=%s" % pkt)
-                    return pkt
-            logdbg("parse_text: unknown format: ts=%s payload=%s" %
-                   (ts, payload))
-        logdbg("parse_text failed: ts=%s payload=%s line=%s" %
-               (ts, payload, lines[0]))
-        lines.pop(0)
+            logdbg("parse_json failed: %s", e)
+            if PacketFactory.metrics is not None:
+                PacketFactory.metrics.inc(
+                    'parse_failures_total', labels=(('format', 'json'),))
         return None
 
     TS_PATTERN = re.compile('(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)[\s]+:*(.*)')
@@ -2601,14 +3611,78 @@ class PacketFactory(object):
         try:
             m = PacketFactory.TS_PATTERN.search(line)
             if m:
-                utc = time.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
-                ts = timegm(utc)
+                ts = Packet.parse_time(m.group(1))
                 payload = m.group(2).strip()
         except Exception as e:
             logerr("parse timestamp failed for '%s': %s" % (line, e))
         return ts, payload
 
 
+PacketFactory.build_dispatch()
+
+
+class TextParser(object):
+    # parse plain text output from rtl_433 one line at a time.  a packet
+    # begins with a line that starts with a timestamp, and continues with
+    # any lines that follow it up to the next timestamp.  a packet is
+    # parsed when the next one begins, or when the parser is flushed.
+    #
+    # the parser for a packet is chosen from the payload of its first line,
+    # then gets the lines of the packet as a list, just as when the lines
+    # are parsed in a batch.  lines that do not belong to a packet, and any
+    # lines of a packet that its parser does not use, are ignored.
+
+    FRAME_PATTERN = re.compile('\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d')
+
+    def __init__(self):
+        self._ts = None
+        self._payload = None
+        self._parser = None
+        self._lines = []
+
+    def feed(self, line):
+        # add a line, return a list of the packets that are complete
+        pkts = []
+        if not self._lines or TextParser.FRAME_PATTERN.match(line):
+            pkts = self.flush()
+            ts, payload = PacketFactory.parse_firstline(line)
+            if ts and payload:
+                logdbg("parse_text: ts=%s payload=%s", ts, payload)
+                self._ts = ts
+                self._payload = payload
+                self._parser = PacketFactory.find_parser(payload)
+                if self._parser is None:
+                    logdbg("parse_text: unknown format: ts=%s payload=%s",
+                           ts, payload)
+                    if PacketFactory.metrics is not None:
+                        PacketFactory.metrics.inc(
+                            'unknown_models_total',
+                            labels=(('format', 'text'),))
+                self._lines.append(line)
+            else:
+                logdbg("parse_text failed: ts=%s payload=%s line=%s",
+                       ts, payload, line)
+        else:
+            self._lines.append(line)
+        return pkts
+
+    def flush(self):
+        # return a list with the packet in progress, if any
+        pkts = []
+        if self._lines:
+            lines = self._lines
+            self._lines = []
+            if self._parser is not None:
+                pkt = self._parser.parse_text(self._ts, self._payload, lines)
+                logdbg("pkt=%s", pkt)
+                if pkt is not None:
+                    pkts.append(pkt)
+            for line in lines:
+                logdbg("skip line '%s'", line)
+            self._parser = None
+        return pkts
+
+
 class SDRConfigurationEditor(weewx.drivers.AbstractConfEditor):
     @property
     def default_stanza(self):
@@ -2647,6 +3721,859 @@ class SDRConfigurationEditor(weewx.drivers.AbstractConfEditor):
 """ % DEFAULT_CMD
 
 
+class SensorMap(object):
+    # compiled form of a sensor_map.  each map entry is a pattern of the form
+    #   <observation_name>.<sensor_id>.<packet_type>
+    # where any part may use glob-style wildcards.  entries without wildcards
+    # in the sensor_id and packet_type are indexed by (packet_type, sensor_id),
+    # wildcard parts are compiled to regular expressions once, and the fields
+    # to which each concrete packet key maps are remembered, so a key that has
+    # been seen before costs a single dict lookup.
+
+    MAX_CACHED_KEYS = 5000
+    GLOB_CHARS = re.compile(r'[*?\[]')
+
+    def __init__(self, sensor_map=None):
+        self.sensor_map = sensor_map or dict()
+        self._exact = dict()
+        self._bare = dict()
+        self._by_sensor = dict()
+        self._wildcard = []
+        self._cache = dict()
+        self._parts_cache = dict()
+        self._sensors = dict()
+        for n in self.sensor_map:
+            pattern = self.sensor_map[n]
+            self._exact.setdefault(pattern, []).append(n)
+            pparts = pattern.split('.')
+            if len(pparts) != 3:
+                continue
+            self._bare.setdefault(pparts[0], []).append(n)
+            matchers = [SensorMap._compile_part(x) for x in pparts]
+            if matchers[1] is None and matchers[2] is None:
+                key_ = (pparts[2], pparts[1])
+                self._by_sensor.setdefault(key_, []).append(
+                    (matchers[0], pparts[0], n))
+            else:
+                self._wildcard.append((matchers, pparts, n))
+
+    def __len__(self):
+        return len(self.sensor_map)
+
+    @staticmethod
+    def _compile_part(part):
+        # return a match function for a part with wildcards, None otherwise
+        if SensorMap.GLOB_CHARS.search(part):
+            return re.compile(fnmatch.translate(part)).match
+        return None
+
+    @staticmethod
+    def _part_match(matcher, literal, value):
+        if matcher is None:
+            return literal == value
+        return matcher(value) is not None
+
+    def lookup(self, key_):
+        # return a tuple of (field, is_exact) pairs for the fields to which
+        # the specified packet key maps.
+        try:
+            return self._cache[key_]
+        except KeyError:
+            pass
+        fields = [(n, True) for n in self._exact.get(key_, [])]
+        kparts = key_.split('.')
+        if len(kparts) == 3:
+            (obs, sensor_id, packet_type) = kparts
+            for (m, literal, n) in self._by_sensor.get(
+                    (packet_type, sensor_id), []):
+                if SensorMap._part_match(m, literal, obs):
+                    fields.append((n, False))
+            for (matchers, pparts, n) in self._wildcard:
+                if (SensorMap._part_match(matchers[0], pparts[0], obs) and
+                    SensorMap._part_match(matchers[1], pparts[1], sensor_id) and
+                    SensorMap._part_match(matchers[2], pparts[2], packet_type)):
+                    fields.append((n, False))
+        else:
+            fields.extend([(n, False) for n in self._bare.get(key_, [])])
+        fields = tuple(fields)
+        if len(self._cache) >= SensorMap.MAX_CACHED_KEYS:
+            self._cache.clear()
+        self._cache[key_] = fields
+        return fields
+
+    def lookup_parts(self, obs, sensor_id, packet_type):
+        # same as lookup, for a key that is not yet qualified
+        parts = (obs, sensor_id, packet_type)
+        try:
+            return self._parts_cache[parts]
+        except KeyError:
+            pass
+        fields = self.lookup("%s.%s.%s" % parts)
+        if len(self._parts_cache) >= SensorMap.MAX_CACHED_KEYS:
+            self._parts_cache.clear()
+        self._parts_cache[parts] = fields
+        return fields
+
+    def packet_types(self):
+        # the packet types named by the map, or None if any entry uses a
+        # wildcard for the packet type
+        types = set()
+        for pattern in self._exact:
+            pparts = pattern.split('.')
+            if len(pparts) == 3:
+                if SensorMap.GLOB_CHARS.search(pparts[2]):
+                    return None
+                types.add(pparts[2])
+        return types
+
+    def maps_sensor(self, packet_type, sensor_id):
+        # whether any entry in the map could match the sensor
+        key_ = (packet_type, sensor_id)
+        try:
+            return self._sensors[key_]
+        except KeyError:
+            pass
+        mapped = key_ in self._by_sensor
+        if not mapped:
+            for (matchers, pparts, _) in self._wildcard:
+                if (SensorMap._part_match(matchers[1], pparts[1], sensor_id) and
+                    SensorMap._part_match(matchers[2], pparts[2], packet_type)):
+                    mapped = True
+                    break
+        if len(self._sensors) >= SensorMap.MAX_CACHED_KEYS:
+            self._sensors.clear()
+        self._sensors[key_] = mapped
+        return mapped
+
+    def map_packet(self, pkt):
+        # each field takes the value of the packet key that matches its
+        # pattern exactly, otherwise the first key that matches the pattern.
+        packet = dict()
+        if isinstance(pkt, PacketRecord):
+            for (k, v) in pkt.meta_items():
+                for (n, is_exact) in self.lookup(k):
+                    if is_exact or n not in packet:
+                        packet[n] = v
+            obs = pkt.obs
+            for k in obs:
+                for (n, is_exact) in self.lookup_parts(
+                        k, pkt.sensor_id, pkt.packet_type):
+                    if is_exact or n not in packet:
+                        packet[n] = obs[k]
+        else:
+            for k in pkt:
+                for (n, is_exact) in self.lookup(k):
+                    if is_exact or n not in packet:
+                        packet[n] = pkt[k]
+        return packet
+
+
+class LineClassifier(object):
+    # decide cheaply, without decoding the json, whether a line might be
+    # mapped by the sensor map.  a json line is wanted if its model has a
+    # parser and the packet type of that parser is named in the sensor map.
+    # plain text lines cannot be classified cheaply, so they are wanted.
+    #
+    # the sensor identifiers in the raw json are not the identifiers used by
+    # the sensor map, since each parser builds them from different fields.
+    # so the driver tells the classifier, with learn, which sensor a line
+    # came from, as the (packet_type, sensor_id) of the parsed packet, and
+    # whether that sensor is in the map.  after that, lines from the same
+    # model with the same raw identifiers are classified by what was
+    # learned.  the raw identifiers are every field that a parser uses for
+    # the sensor id.  if lines with the same raw identifiers still turn out
+    # to come from different sensors, those lines are always wanted.
+    #
+    # the prefilter discards lines for good, so it uses only the model, with
+    # is_wanted_model.  what was learned is used only to order the lines
+    # in the queue.
+
+    MODEL_PATTERN = re.compile(b'"model"\\s*:\\s*"([^"]*)"')
+    ID_PATTERN = re.compile(
+        b'"(?:id|rid|sensor_id|station_id|uv_sensor_id|ws_id|device|sid|rc|'
+        b'channel)"\\s*:\\s*(?:"[^"]*"|[^,}\\s]*)')
+    MAX_CACHED_MODELS = 1000
+    MAX_LEARNED_SENSORS = 5000
+
+    def __init__(self, sensor_map):
+        self._types = sensor_map.packet_types()
+        self._cache = dict()
+        self._learned = dict()
+
+    @staticmethod
+    def sensor_key(line):
+        # the model and raw identifiers of a json line, or None
+        m = LineClassifier.MODEL_PATTERN.search(line)
+        if not m:
+            return None
+        return m.group(1), tuple(LineClassifier.ID_PATTERN.findall(line))
+
+    def learn(self, key_, sensor, mapped):
+        # remember that the line with the sensor_key key_ came from sensor,
+        # and whether that sensor is mapped
+        if key_ is None or sensor is None:
+            return
+        learned = self._learned.get(key_)
+        if learned is not None and learned[0] != sensor:
+            if learned[0] is not None:
+                logdbg("sensors %s and %s send the same identifiers %s",
+                       learned[0], sensor, key_)
+            sensor = None
+            mapped = True
+        elif len(self._learned) >= LineClassifier.MAX_LEARNED_SENSORS:
+            self._learned.clear()
+        self._learned[key_] = (sensor, mapped)
+
+    def is_wanted(self, line):
+        if line[:1] != b'{':
+            return True
+        return self.is_wanted_key(line, LineClassifier.sensor_key(line))
+
+    def is_wanted_key(self, line, key_):
+        # is_wanted for a json line whose sensor_key is already known
+        if key_ is not None:
+            try:
+                return self._learned[key_][1]
+            except KeyError:
+                pass
+        return self.is_wanted_model(line, key_)
+
+    def is_wanted_model(self, line, key_):
+        # whether any packet type in the sensor map could parse a json line
+        # whose sensor_key is already known, regardless of the sensor
+        if key_ is None:
+            # the reports from '-M stats' have no model, but are wanted
+            return b'"frames"' in line
+        model = key_[0]
+        try:
+            return self._cache[model]
+        except KeyError:
+            pass
+        parser = PacketFactory.lookup_parser(model.decode('utf-8', 'replace'))
+        wanted = parser is not None and (
+            self._types is None or parser.__name__ in self._types)
+        if len(self._cache) >= LineClassifier.MAX_CACHED_MODELS:
+            self._cache.clear()
+        self._cache[model] = wanted
+        return wanted
+
+
+class ParserPool(object):
+    # parse and map json lines in worker processes, so that more than one
+    # core does the work when there are many sensors.  the lines are sharded
+    # by sensor, so the lines from each sensor are always parsed, in order,
+    # by the same worker.  each worker returns the packets and the mapped
+    # packets for its lines, along with the radio levels and the counts of
+    # unknown models and failures, which are merged into those of the
+    # driver.  lines without a sensor, such as the reports from '-M stats',
+    # and plain text are left to the caller.
+
+    JOIN_TIMEOUT = 2
+
+    def __init__(self, workers, sensor_map):
+        import multiprocessing
+        self._workers = []
+        try:
+            for i in range(workers):
+                (conn, child_conn) = multiprocessing.Pipe()
+                proc = multiprocessing.Process(
+                    target=ParserPool._work, args=(child_conn, sensor_map),
+                    name='sdr-parser-%d' % i)
+                proc.daemon = True
+                proc.start()
+                child_conn.close()
+                self._workers.append((proc, conn))
+        except (OSError, ValueError):
+            self.shutdown()
+            raise
+
+    def __len__(self):
+        return len(self._workers)
+
+    @staticmethod
+    def _work(conn, sensor_map):
+        mapper = SensorMap(sensor_map)
+        PacketFactory.radio_stats = RadioStats()
+        while True:
+            try:
+                items = conn.recv()
+            except (EOFError, IOError, KeyboardInterrupt):
+                break
+            if items is None:
+                break
+            PacketFactory.metrics = Metrics()
+            PacketFactory.radio_stats.reset_levels()
+            results = []
+            for (i, line) in items:
+                packets = list(PacketFactory.create([line]))
+                results.append((i, [(p, SDRDriver.map_to_fields(p, mapper))
+                                    for p in packets]))
+            try:
+                conn.send((results, PacketFactory.radio_stats.levels,
+                           PacketFactory.metrics.counters()))
+            except (IOError, KeyboardInterrupt):
+                break
+
+    def parse(self, items):
+        # items is a list of (index, line, sensor_key).  return a dict of the
+        # list of (packet, mapped) for each index, or None if a worker failed.
+        shards = [[] for _ in self._workers]
+        for (i, line, key_) in items:
+            shards[hash(key_) % len(shards)].append((i, line))
+        results = dict()
+        try:
+            busy = []
+            for (shard, (_, conn)) in zip(shards, self._workers):
+                if shard:
+                    conn.send(shard)
+                    busy.append(conn)
+            for conn in busy:
+                (shard_results, levels, counters) = conn.recv()
+                results.update(shard_results)
+                if PacketFactory.radio_stats is not None:
+                    PacketFactory.radio_stats.merge_levels(levels)
+                if PacketFactory.metrics is not None:
+                    PacketFactory.metrics.merge(counters)
+        except (EOFError, IOError, OSError) as e:
+            logerr("parser worker failed: %s" % e)
+            return None
+        return results
+
+    def shutdown(self):
+        for (proc, conn) in self._workers:
+            try:
+                conn.send(None)
+            except (IOError, OSError):
+                pass
+        for (proc, conn) in self._workers:
+            proc.join(ParserPool.JOIN_TIMEOUT)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+        self._workers = []
+
+
+class DedupCache(object):
+    # rtl_433 usually reports each transmission two or three times, and the
+    # repeats of one sensor may be interleaved with packets from others.  a
+    # packet is a duplicate if the last packet from the same sensor had the
+    # same fingerprint and the first packet with that fingerprint arrived no
+    # more than window seconds earlier, so a sensor that sends the same
+    # values more often than the window is not suppressed forever.  the
+    # cache remembers the most recently seen max_sensors sensors.
+
+    def __init__(self, window=2, max_sensors=100):
+        self.window = window
+        self.max_sensors = max_sensors
+        self.hits = 0
+        self.misses = 0
+        self._last = collections.OrderedDict()
+
+    @staticmethod
+    def fingerprint(pkt):
+        # a hash of the observations in a packet, ignoring the timestamp
+        return hash(frozenset([(k, pkt[k]) for k in pkt if k != 'dateTime']))
+
+    def is_duplicate(self, sensor, pkt):
+        ts = pkt.get('dateTime')
+        if ts is None:
+            ts = time.time()
+        fp = DedupCache.fingerprint(pkt)
+        last = self._last.pop(sensor, None)
+        if last is not None and last[0] == fp and \
+                0 <= ts - last[1] <= self.window:
+            # keep the time of the first packet, so the window does not slide
+            self._last[sensor] = last
+            self.hits += 1
+            return True
+        self._last[sensor] = (fp, ts)
+        if len(self._last) > self.max_sensors:
+            self._last.popitem(last=False)
+        self.misses += 1
+        return False
+
+
+class RadioStats(object):
+    # what rtl_433 says about the radio: the settings and errors it writes
+    # to stderr, the decoder statistics it reports with '-M stats', and the
+    # signal levels it adds to each packet with '-M level'.  rtl_433 resets
+    # its statistics after each report, so the reports are accumulated here.
+    # each report has a different 'since' time, so the repeat cache never
+    # mistakes one report for another.
+    # everything is bounded: a fixed set of settings, the most recent error
+    # messages, and the counts for at most MAX_PROTOCOLS protocols.
+
+    SETTINGS = [
+        ('tuner', re.compile('Found (.+) tuner')),
+        ('frequency', re.compile('Tuned to ([\d.]+\s*[kMG]?Hz)')),
+        ('sample_rate', re.compile('[Ss]ample rate set to (\d+)')),
+        ('gain', re.compile('[Gg]ain set to ([^.]+)')),
+        ('protocols', re.compile('Registered (\d+) out of \d+'))]
+    ERROR_PATTERN = re.compile('error|fail|warning|cannot|unable', re.I)
+    LEVELS = ['rssi', 'snr', 'noise']
+    MAX_PROTOCOLS = 256
+    MAX_MESSAGES = 20
+
+    def __init__(self):
+        self.settings = dict()
+        self.stderr_lines = 0
+        self.errors = 0
+        self.messages = collections.deque(maxlen=RadioStats.MAX_MESSAGES)
+        self.reports = 0
+        self.frames = dict()
+        self.protocols = dict()
+        self.levels = dict()
+
+    def add_stderr(self, lines):
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', 'replace')
+            line = line.strip()
+            if not line:
+                continue
+            self.stderr_lines += 1
+            for (name, pattern) in RadioStats.SETTINGS:
+                m = pattern.search(line)
+                if m:
+                    self.settings[name] = m.group(1).strip()
+                    break
+            else:
+                if RadioStats.ERROR_PATTERN.search(line):
+                    self.errors += 1
+                    self.messages.append(line)
+
+    def add_report(self, obj):
+        # add the counts from a '-M stats' report
+        self.reports += 1
+        frames = obj.get('frames') or dict()
+        for k in frames:
+            if isinstance(frames[k], (int, float)):
+                self.frames[k] = self.frames.get(k, 0) + frames[k]
+        for dev in obj.get('stats') or []:
+            device = dev.get('device')
+            if device not in self.protocols:
+                if len(self.protocols) >= RadioStats.MAX_PROTOCOLS:
+                    continue
+                self.protocols[device] = {'name': dev.get('name')}
+            counts = self.protocols[device]
+            for k in dev:
+                if k != 'device' and isinstance(dev[k], (int, float)):
+                    counts[k] = counts.get(k, 0) + dev[k]
+
+    def add_levels(self, obj):
+        # add the levels from a packet decoded with '-M level'.  for each
+        # level keep [count, sum, min, max] since the last reset.
+        for k in RadioStats.LEVELS:
+            try:
+                value = float(obj[k])
+            except (KeyError, TypeError, ValueError):
+                continue
+            agg = self.levels.get(k)
+            if agg is None:
+                self.levels[k] = [1, value, value, value]
+            else:
+                agg[0] += 1
+                agg[1] += value
+                agg[2] = min(agg[2], value)
+                agg[3] = max(agg[3], value)
+
+    def reset_levels(self):
+        self.levels = dict()
+
+    def merge_levels(self, levels):
+        # add the levels kept by another instance
+        for (k, other) in levels.items():
+            agg = self.levels.get(k)
+            if agg is None:
+                self.levels[k] = list(other)
+            else:
+                agg[0] += other[0]
+                agg[1] += other[1]
+                agg[2] = min(agg[2], other[2])
+                agg[3] = max(agg[3], other[3])
+
+    def summary(self):
+        # one line describing the radio, or None if nothing is known
+        parts = ['%s=%s' % (k, self.settings[k]) for k in sorted(self.settings)]
+        if self.errors:
+            parts.append('errors=%s' % self.errors)
+        if self.reports:
+            parts.extend(['frames_%s=%s' % (k, self.frames[k])
+                          for k in sorted(self.frames)])
+        for k in RadioStats.LEVELS:
+            if k in self.levels:
+                agg = self.levels[k]
+                parts.append('%s=%.1f/%.1f/%.1f' %
+                             (k, agg[2], agg[1] / agg[0], agg[3]))
+        return ' '.join(parts) if parts else None
+
+    def protocol_summary(self):
+        # one line with the decode counts for each protocol
+        parts = []
+        for device in sorted(self.protocols, key=lambda x: '%s' % x):
+            counts = self.protocols[device]
+            parts.append('%s(%s)=%s/%s' % (
+                device, counts.get('name'), counts.get('ok', 0),
+                counts.get('events', 0)))
+        return ' '.join(parts)
+
+
+class RestartPolicy(object):
+    # decide when to restart rtl_433 after it stops.  the delay before each
+    # restart doubles with each restart in the last window seconds, from
+    # backoff up to max_backoff.  after max_restarts restarts in the last
+    # window seconds, give up so that the error is passed on to weewx.
+
+    def __init__(self, max_restarts=5, window=3600, backoff=2.0,
+                 max_backoff=300.0):
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.restarts = 0
+        self._recent = collections.deque()
+
+    def next_delay(self, now):
+        # the seconds to wait before the next restart, or None to give up
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_restarts:
+            return None
+        return min(self.max_backoff, self.backoff * 2 ** len(self._recent))
+
+    def record(self, now):
+        self.restarts += 1
+        self._recent.append(now)
+
+
+class ProcessSampler(object):
+    # measure the cpu and memory use of a process from /proc.  where there
+    # is no /proc, the measurements are None.
+
+    try:
+        CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+        PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        CLOCK_TICKS = 100
+        PAGE_SIZE = 4096
+
+    def __init__(self):
+        self.cpu_percent = None
+        self.rss_bytes = None
+        self._last = None
+
+    def reset(self):
+        self.cpu_percent = None
+        self.rss_bytes = None
+        self._last = None
+
+    def sample(self, pid, now):
+        # update the measurements for the process
+        try:
+            with open('/proc/%s/stat' % pid) as f:
+                data = f.read()
+        except (IOError, OSError, TypeError):
+            self.reset()
+            return
+        # the command name may contain spaces, so split after it
+        fields = data[data.rfind(')') + 2:].split()
+        ticks = int(fields[11]) + int(fields[12])
+        self.rss_bytes = int(fields[21]) * ProcessSampler.PAGE_SIZE
+        if self._last is not None and now > self._last[1]:
+            self.cpu_percent = 100.0 * (ticks - self._last[0]) / \
+                ProcessSampler.CLOCK_TICKS / (now - self._last[1])
+        self._last = (ticks, now)
+
+
+class Watchdog(object):
+    # watch for an rtl_433 that is running but no longer working.  the
+    # radio is stalled when no packet has been decoded for stall_timeout
+    # seconds.  a mapped sensor that has not been heard from for
+    # sensor_timeout seconds is logged, but is not a stall, since it may
+    # only need a new battery.  the process is too busy or too big when its
+    # cpu or memory use exceeds max_cpu_percent or max_rss_mb.  a timeout or
+    # limit of 0 is not checked.  the checks are done every CHECK_INTERVAL
+    # seconds, so the cpu use is the average over that time.
+
+    CHECK_INTERVAL = 30
+    MAX_SENSORS = 100
+
+    def __init__(self, stall_timeout=0, sensor_timeout=0, max_cpu_percent=0,
+                 max_rss_mb=0):
+        self.stall_timeout = stall_timeout
+        self.sensor_timeout = sensor_timeout
+        self.max_cpu_percent = max_cpu_percent
+        self.max_rss_mb = max_rss_mb
+        self.sampler = ProcessSampler()
+        self.last_packet = time.time()
+        self._last_check = 0
+        self._sensors = collections.OrderedDict()
+        self._silent = set()
+
+    def enabled(self):
+        return bool(self.stall_timeout or self.sensor_timeout or
+                    self.max_cpu_percent or self.max_rss_mb)
+
+    def reset(self, now):
+        # start over, for a new process
+        self.last_packet = now
+        self.sampler.reset()
+        for sensor in self._sensors:
+            self._sensors[sensor] = now
+
+    def decoded(self, now):
+        self.last_packet = now
+
+    def heard(self, sensor, now):
+        # a packet from a mapped sensor
+        if sensor in self._silent:
+            self._silent.discard(sensor)
+            loginf("sensor %s:%s is transmitting again", *sensor)
+        self._sensors.pop(sensor, None)
+        self._sensors[sensor] = now
+        if len(self._sensors) > Watchdog.MAX_SENSORS:
+            self._silent.discard(self._sensors.popitem(last=False)[0])
+
+    def check(self, pid, now):
+        # return the reason the process should be restarted, or None
+        if now - self._last_check < Watchdog.CHECK_INTERVAL:
+            return None
+        self._last_check = now
+        if self.sensor_timeout:
+            for sensor in self._sensors:
+                if sensor not in self._silent and (
+                        now - self._sensors[sensor] > self.sensor_timeout):
+                    self._silent.add(sensor)
+                    loginf("no packets from sensor %s:%s for %.0f seconds",
+                           sensor[0], sensor[1], now - self._sensors[sensor])
+        if self.stall_timeout and now - self.last_packet > self.stall_timeout:
+            return "no packets for %.0f seconds" % (now - self.last_packet)
+        if self.max_cpu_percent or self.max_rss_mb:
+            self.sampler.sample(pid, now)
+            cpu = self.sampler.cpu_percent
+            rss = self.sampler.rss_bytes
+            if self.max_cpu_percent and cpu is not None and (
+                    cpu > self.max_cpu_percent):
+                return "rtl_433 cpu use is %.0f%%" % cpu
+            if self.max_rss_mb and rss is not None and (
+                    rss > self.max_rss_mb * 1024 * 1024):
+                return "rtl_433 memory use is %.0f MB" % (rss / 1048576.0)
+        return None
+
+
+class Metrics(object):
+    # counters, gauges, and histograms about the driver, rendered in the
+    # prometheus text format.  a series is identified by the name of its
+    # metric and a tuple of (label, value) pairs.  each metric has at most
+    # MAX_SERIES series; anything more is counted in a series whose label
+    # values are 'other'.  metrics that are kept elsewhere are registered
+    # as functions and read only when the metrics are rendered.
+    #
+    # updates are single dict operations, which are atomic in the
+    # interpreter, so the http thread can read the metrics while the driver
+    # thread updates them without a lock.
+
+    PREFIX = 'weewx_sdr_'
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+               0.05, 0.1, 0.25, 0.5, 1.0)
+    MAX_SERIES = 200
+
+    def __init__(self):
+        self._counters = dict()
+        self._histograms = dict()
+        self._functions = dict()
+
+    @staticmethod
+    def _bounded(series, labels):
+        if labels in series or len(series) < Metrics.MAX_SERIES:
+            return labels
+        return tuple([(k, 'other') for (k, _) in labels])
+
+    def inc(self, name, value=1, labels=()):
+        series = self._counters.get(name)
+        if series is None:
+            series = self._counters[name] = dict()
+        labels = Metrics._bounded(series, labels)
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, value, labels=()):
+        # add a value to a histogram.  each histogram is a list of the count
+        # in each bucket, the count above the last bucket, the sum, and the
+        # count of all values.
+        series = self._histograms.get(name)
+        if series is None:
+            series = self._histograms[name] = dict()
+        labels = Metrics._bounded(series, labels)
+        h = series.get(labels)
+        if h is None:
+            h = series[labels] = [0] * (len(Metrics.BUCKETS) + 3)
+        h[bisect.bisect_left(Metrics.BUCKETS, value)] += 1
+        h[-2] += value
+        h[-1] += 1
+
+    def register(self, name, kind, func):
+        # func returns a number, or a dict of numbers keyed by labels
+        self._functions[name] = (kind, func)
+
+    def counters(self):
+        return self._counters
+
+    def merge(self, counters):
+        # add the counters kept by another instance
+        for (name, series) in counters.items():
+            for (labels, value) in series.items():
+                self.inc(name, value, labels)
+
+    def total(self, name):
+        # the sum of all series of a counter
+        return sum(self._counters.get(name, dict()).values())
+
+    def mean(self, name, labels=None):
+        # the mean of the values in a series of a histogram, or in all of
+        # its series, or None if there are no values
+        series = self._histograms.get(name, dict())
+        if labels is None:
+            hs = list(series.values())
+        else:
+            hs = [series[labels]] if labels in series else []
+        count = sum([h[-1] for h in hs])
+        return sum([h[-2] for h in hs]) / count if count else None
+
+    @staticmethod
+    def _escape(value):
+        value = '%s' % (value,)
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+            '\n', '\\n')
+
+    @staticmethod
+    def _format(name, labels, value):
+        if labels:
+            name = '%s{%s}' % (name, ','.join(
+                ['%s="%s"' % (k, Metrics._escape(v)) for (k, v) in labels]))
+        return '%s %s' % (name, value)
+
+    def render(self):
+        out = []
+        for name in sorted(self._counters):
+            full = Metrics.PREFIX + name
+            out.append('# TYPE %s counter' % full)
+            for (labels, value) in sorted(self._counters[name].items()):
+                out.append(Metrics._format(full, labels, value))
+        for name in sorted(self._functions):
+            (kind, func) = self._functions[name]
+            try:
+                values = func()
+            except Exception as e:
+                logdbg("metric %s failed: %s", name, e)
+                continue
+            if values is None:
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            full = Metrics.PREFIX + name
+            out.append('# TYPE %s %s' % (full, kind))
+            for (labels, value) in sorted(values.items()):
+                out.append(Metrics._format(full, labels, value))
+        for name in sorted(self._histograms):
+            full = Metrics.PREFIX + name
+            out.append('# TYPE %s histogram' % full)
+            for (labels, h) in sorted(self._histograms[name].items()):
+                cumulative = 0
+                for (i, bound) in enumerate(Metrics.BUCKETS):
+                    cumulative += h[i]
+                    out.append(Metrics._format(
+                        full + '_bucket', labels + (('le', bound),),
+                        cumulative))
+                out.append(Metrics._format(
+                    full + '_bucket', labels + (('le', '+Inf'),), h[-1]))
+                out.append(Metrics._format(full + '_sum', labels, h[-2]))
+                out.append(Metrics._format(full + '_count', labels, h[-1]))
+        return '\n'.join(out) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    # serve the metrics of the server at / or /metrics
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ['/', '/metrics']:
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        # do not log every request
+        pass
+
+
+class MetricsServer(threading.Thread):
+    # serve the metrics over http from a thread
+
+    def __init__(self, metrics, address='127.0.0.1', port=0):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.setName('metrics-thread')
+        self._server = HTTPServer((address, port), MetricsHandler)
+        self._server.metrics = metrics
+
+    def run(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SensorLogSummary(object):
+    # log unknown or unmapped sensors without logging every packet.  the
+    # first packet from each sensor is logged, then only the number of
+    # packets from each sensor is logged, once per summary.  no more than
+    # max_new sensors are logged between summaries, and no more than
+    # max_sensors sensors are tracked; packets from others are counted as
+    # other.
+
+    MAX_SUMMARY_SENSORS = 10
+
+    def __init__(self, label, max_new=10, max_sensors=100):
+        self.label = label
+        self.max_new = max_new
+        self.max_sensors = max_sensors
+        self._seen = set()
+        self._counts = dict()
+        self._new = 0
+        self._other = 0
+
+    def add(self, sensor, detail):
+        if sensor in self._seen:
+            self._counts[sensor] = self._counts.get(sensor, 0) + 1
+        elif len(self._seen) < self.max_sensors and self._new < self.max_new:
+            self._seen.add(sensor)
+            self._new += 1
+            loginf("%s: %s: %s", self.label, sensor, detail)
+        else:
+            self._other += 1
+
+    def summarize(self):
+        # log the counts since the last summary, busiest sensors first
+        self._new = 0
+        if not self._counts and not self._other:
+            return
+        counts = sorted(self._counts.items(), key=lambda x: -x[1])
+        shown = counts[:SensorLogSummary.MAX_SUMMARY_SENSORS]
+        other = self._other + sum([c for (_, c) in counts[len(shown):]])
+        parts = ['%s=%s' % (k, c) for (k, c) in shown]
+        if other:
+            parts.append('other=%s' % other)
+        loginf("%s: packets since last summary: %s",
+               self.label, ' '.join(parts))
+        self._counts = dict()
+        self._other = 0
+
+
 class SDRDriver(weewx.drivers.AbstractDevice):
 
     # map the counter total to the counter delta.  for example, the pair
@@ -2661,47 +4588,456 @@ class SDRDriver(weewx.drivers.AbstractDevice):
         loginf('driver version is %s' % DRIVER_VERSION)
         self._log_unknown = tobool(stn_dict.get('log_unknown_sensors', False))
         self._log_unmapped = tobool(stn_dict.get('log_unmapped_sensors', False))
+        # summarize unknown and unmapped sensors instead of logging every
+        # packet from them
+        self._log_summary = tobool(stn_dict.get('log_summary', True))
+        self._unknown_log = SensorLogSummary('unparsed')
+        self._unmapped_log = SensorLogSummary('unmapped')
         self._sensor_map = stn_dict.get('sensor_map', {})
         loginf('sensor map is %s' % self._sensor_map)
+        self._mapper = SensorMap(self._sensor_map)
         self._deltas = stn_dict.get('deltas', SDRDriver.DEFAULT_DELTAS)
         loginf('deltas is %s' % self._deltas)
         self._counter_values = dict()
         cmd = stn_dict.get('cmd', DEFAULT_CMD)
+        if tobool(stn_dict.get('auto_protocols', False)):
+            cmd = SDRDriver.build_cmd_for_map(cmd, self._mapper)
         path = stn_dict.get('path', None)
         ld_library_path = stn_dict.get('ld_library_path', None)
-        self._last_pkt = None # avoid duplicate sequential packets
-        self._mgr = ProcManager()
+        dedup_window = float(stn_dict.get('dedup_window', 2))
+        dedup_max_sensors = int(stn_dict.get('dedup_max_sensors', 100))
+        loginf('dedup window is %ss for up to %s sensors' %
+               (dedup_window, dedup_max_sensors))
+        self._dedup = DedupCache(dedup_window, dedup_max_sensors)
+        self._radio = RadioStats()
+        PacketFactory.radio_stats = self._radio
+        self._metrics = Metrics()
+        PacketFactory.metrics = self._metrics
+        self._last_packet_ts = time.time()
+        max_restarts = int(stn_dict.get('max_restarts', 5))
+        restart_window = int(stn_dict.get('restart_window', 3600))
+        restart_backoff = float(stn_dict.get('restart_backoff', 2))
+        restart_backoff_max = float(stn_dict.get('restart_backoff_max', 300))
+        loginf('restart at most %s times in %ss, backoff %ss to %ss' %
+               (max_restarts, restart_window, restart_backoff,
+                restart_backoff_max))
+        self._restart_policy = RestartPolicy(
+            max_restarts, restart_window, restart_backoff, restart_backoff_max)
+        self._watchdog = Watchdog(
+            int(stn_dict.get('stall_timeout', 0)),
+            int(stn_dict.get('sensor_timeout', 0)),
+            float(stn_dict.get('max_cpu_percent', 0)),
+            float(stn_dict.get('max_rss_mb', 0)))
+        self._watchdog_enabled = self._watchdog.enabled()
+        # the watchdog must be checked even when rtl_433 is quiet
+        self._poll_interval = ProcManager.POLL_INTERVAL \
+            if self._watchdog_enabled else None
+        self._watchdog_action = stn_dict.get('watchdog_action', 'restart')
+        if self._watchdog_action not in ['restart', 'error']:
+            raise weewx.ViolatedPrecondition(
+                "unknown watchdog_action '%s'" % self._watchdog_action)
+        if self._watchdog_enabled:
+            loginf('watchdog stall timeout is %ss, sensor timeout is %ss,'
+                   ' max cpu is %s%%, max rss is %s MB, action is %s' %
+                   (self._watchdog.stall_timeout,
+                    self._watchdog.sensor_timeout,
+                    self._watchdog.max_cpu_percent,
+                    self._watchdog.max_rss_mb, self._watchdog_action))
+        PacketFactory.json_decoder = JsonDecoder(
+            stn_dict.get('json_decoder', 'auto'))
+        loginf('json decoder is %s' % PacketFactory.json_decoder.name)
+        repeat_window = float(stn_dict.get('repeat_window', 2))
+        loginf('repeat window is %ss' % repeat_window)
+        PacketFactory.repeat_cache = RepeatCache(repeat_window) \
+            if repeat_window > 0 else None
+        reader_mode = stn_dict.get('reader_mode', 'line')
+        loginf('reader mode is %s' % reader_mode)
+        # parser workers need batches of lines to share out, so batch the
+        # lines unless told otherwise
+        parse_workers = int(stn_dict.get('parse_workers', 0))
+        batch_max_lines = int(stn_dict.get(
+            'batch_max_lines', 100 if parse_workers else 1))
+        batch_max_age = int(stn_dict.get(
+            'batch_max_age_ms', 100 if parse_workers else 0)) / 1000.0
+        loginf('batch max lines is %s, max age is %.3fs' %
+               (batch_max_lines, batch_max_age))
+        queue_max_lines = int(stn_dict.get('queue_max_lines', 10000))
+        queue_policy = stn_dict.get('queue_policy', 'drop-oldest')
+        loginf('queue max lines is %s, policy is %s' %
+               (queue_max_lines, queue_policy))
+        self._stats_interval = int(stn_dict.get('stats_interval', 300))
+        self._last_stats_ts = time.time()
+        self._last_dropped = dict()
+        priority = tobool(stn_dict.get('priority_lane', False))
+        priority_shed_lines = int(stn_dict.get('priority_shed_lines', 1000))
+        if priority:
+            loginf('priority lane for mapped sensors, shed at %s lines' %
+                   priority_shed_lines)
+        self._classifier = LineClassifier(self._mapper)
+        queue_classifier = priority or queue_policy == 'drop-unmapped-first'
+        # discard lines from unwanted sensors before decoding them, unless
+        # we are looking for sensors that are not yet in the map
+        self._prefilter = tobool(stn_dict.get('prefilter', True)) and not (
+            self._log_unknown or self._log_unmapped)
+        loginf('prefilter is %s' % self._prefilter)
+        # teach the classifier which sensors are mapped only if the queue
+        # asks it about them
+        self._learn = queue_classifier
+        self._filtered = 0
+        # start any parser workers before rtl_433 and the reader threads, so
+        # that the workers do not inherit them
+        self._pool = None
+        if parse_workers > 0:
+            try:
+                self._pool = ParserPool(parse_workers, self._sensor_map)
+                loginf('parsing with %s worker processes' % parse_workers)
+            except (ImportError, OSError, ValueError) as e:
+                logerr("cannot start parser workers, parsing in process: %s"
+                       % e)
+        self._register_metrics()
+        self._mgr = ProcManager.create(
+            reader_mode,
+            batch_max_lines=batch_max_lines,
+            batch_max_age=batch_max_age,
+            queue_max_lines=queue_max_lines,
+            queue_policy=queue_policy,
+            classifier=self._classifier if queue_classifier else None,
+            priority=priority,
+            priority_shed_lines=priority_shed_lines)
+        self._startup(cmd, path, ld_library_path)
+        self._metrics_server = None
+        metrics_port = int(stn_dict.get('metrics_port', 0))
+        if metrics_port:
+            address = stn_dict.get('metrics_address', '127.0.0.1')
+            loginf('serving metrics at http://%s:%s/metrics' %
+                   (address, metrics_port))
+            try:
+                self._metrics_server = MetricsServer(
+                    self._metrics, address, metrics_port)
+                self._metrics_server.start()
+            except (IOError, OSError) as e:
+                logerr("cannot serve metrics: %s" % e)
+                self._metrics_server = None
+
+    def _startup(self, cmd, path, ld_library_path):
         self._mgr.startup(cmd, path, ld_library_path)
 
     def closePort(self):
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
         self._mgr.shutdown()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _register_metrics(self):
+        # metrics that are kept elsewhere
+        m = self._metrics
+        m.register('queue_lines', 'gauge', lambda: dict(
+            [((('stream', k),), q.qsize()) for (k, q) in [
+                ('stdout', self._mgr.stdout_queue),
+                ('stderr', self._mgr.stderr_queue)]]))
+        m.register('dropped_lines_total', 'counter', lambda: dict(
+            [((('stream', k),), v) for (k, v) in
+             self._mgr.get_dropped().items()]))
+        m.register('filtered_lines_total', 'counter', lambda: self._filtered)
+        m.register('repeated_lines_total', 'counter', lambda: (
+            PacketFactory.repeat_cache.hits
+            if PacketFactory.repeat_cache is not None else None))
+        m.register('restarts_total', 'counter',
+                   lambda: self._restart_policy.restarts)
+        m.register('seconds_since_packet', 'gauge',
+                   lambda: time.time() - self._last_packet_ts)
+        m.register('radio_frames_total', 'counter', lambda: dict(
+            [((('kind', k),), v) for (k, v) in self._radio.frames.items()]))
+        m.register('radio_errors_total', 'counter', lambda: self._radio.errors)
+
+    @staticmethod
+    def build_cmd_for_map(cmd, sensor_map):
+        # limit the rtl_433 decoders to those for the packet types in the map
+        types = sensor_map.packet_types()
+        protocols = PacketFactory.protocols_for(types) if types else None
+        if not protocols:
+            loginf("cannot determine rtl_433 protocols for sensor map,"
+                   " using cmd as specified")
+            return cmd
+        cmd = SDRDriver.build_cmd(cmd, protocols)
+        loginf("using protocols %s for packet types %s" %
+               (protocols, sorted(types)))
+        return cmd
+
+    @staticmethod
+    def build_cmd(cmd, protocols):
+        # replace any -R and -G options in the command with a -R option for
+        # each of the specified protocols
+        parts = []
+        skip = False
+        for x in cmd.split(' '):
+            if skip:
+                skip = False
+            elif x == '-R':
+                skip = True
+            elif not x.startswith('-R') and not x.startswith('-G'):
+                parts.append(x)
+        for n in protocols:
+            parts.extend(['-R', str(n)])
+        return ' '.join(parts)
 
     @property
     def hardware_name(self):
         return 'SDR'
 
     def genLoopPackets(self):
-        while self._mgr.running():
-            for lines in self._mgr.get_stdout():
-                for packet in PacketFactory.create(lines):
-                    if packet:
-                        pkt = self.map_to_fields(packet, self._sensor_map)
-                        if pkt:
-                            if pkt != self._last_pkt:
-                                logdbg("packet=%s" % pkt)
-                                self._last_pkt = pkt
-                                self._calculate_deltas(pkt)
-                                yield pkt
-                            else:
-                                logdbg("ignoring duplicate packet %s" % pkt)
-                        elif self._log_unmapped:
-                            loginf("unmapped: %s (%s)" % (lines, packet))
-                    elif self._log_unknown:
-                        loginf("unparsed: %s" % lines)
-            self._mgr.get_stderr()  # flush the stderr queue
+        # when rtl_433 stops, restart it in place so that the counters and
+        # other state of the driver are kept
+        m = self._metrics
+        while True:
+            reason = None
+            while reason is None and self._mgr.running():
+                for lines in self._mgr.get_stdout(self._poll_interval):
+                    self._drain_stderr()
+                    self._log_stats()
+                    reason = self._check_watchdog()
+                    if reason is not None:
+                        break
+                    m.inc('lines_read_total', len(lines))
+                    for (line, key_, packet, mapped) in \
+                            self._parse_lines(lines):
+                        pkt = self._handle_packet(
+                            line, key_, packet, mapped, lines)
+                        if pkt is not None:
+                            yield pkt
+                self._drain_stderr()
+            if reason is None:
+                err = self._drain_stderr()
+                logerr("err: %s" % (err or list(self._radio.messages)))
+                reason = "rtl_433 process is not running"
+            elif self._watchdog_action == 'error':
+                raise weewx.WeeWxIOError(reason)
+            self._restart_process(reason)
+            self._watchdog.reset(time.time())
+
+    def _handle_packet(self, line, key_, packet, mapped, lines):
+        # map, check, and count a packet from _parse_lines.  return the LOOP
+        # packet, or None if the packet is not for weewx.
+        m = self._metrics
+        if packet:
+            t0 = time.time()
+            self._last_packet_ts = t0
+            if self._watchdog_enabled:
+                self._watchdog.decoded(t0)
+            sensor = Packet.sensor_of(packet)
+            m.inc('packets_parsed_total', labels=(
+                ('parser', sensor[0] if sensor else ''),))
+            pkt = mapped
+            if pkt is None:
+                t1 = time.time()
+                pkt = self.map_to_fields(packet, self._mapper)
+                m.observe('stage_seconds', time.time() - t1,
+                          (('stage', 'map'),))
+            if self._learn and key_ is not None:
+                self._classifier.learn(key_, sensor, sensor is not None and
+                                       self._mapper.maps_sensor(*sensor))
+            if pkt:
+                if self._watchdog_enabled:
+                    self._watchdog.heard(sensor, t0)
+                if not self._dedup.is_duplicate(sensor, pkt):
+                    logdbg("packet=%s", pkt)
+                    self._calculate_deltas(pkt)
+                    m.inc('packets_total')
+                    return pkt
+                else:
+                    m.inc('duplicates_total')
+                    logdbg("ignoring duplicate packet %s", pkt)
+            else:
+                m.inc('unmapped_packets_total')
+                if self._log_unmapped:
+                    self._log_unmapped_packet(line, lines, packet)
         else:
-            logerr("err: %s" % self._mgr.get_stderr())
-            raise weewx.WeeWxIOError("rtl_433 process is not running")
+            m.inc('unparsed_lines_total')
+            if self._log_unknown:
+                self._log_unknown_line(line, lines)
+        return None
+
+    def _drain_stderr(self):
+        # keep up with stderr while rtl_433 runs, so that the settings and
+        # errors are recorded and the stderr queue does not overflow.
+        # return the lines that were read.
+        err = []
+        lines = self._mgr.get_stderr()
+        while lines:
+            self._radio.add_stderr(lines)
+            err.extend(lines)
+            lines = self._mgr.get_stderr()
+        return err
+
+    def _check_watchdog(self):
+        if not self._watchdog_enabled:
+            return None
+        reason = self._watchdog.check(self._mgr.pid(), time.time())
+        if reason is not None:
+            logerr("watchdog: %s" % reason)
+        return reason
+
+    def _restart_process(self, reason):
+        # restart rtl_433 after a delay, or raise an error if it has been
+        # restarted too often
+        while True:
+            delay = self._restart_policy.next_delay(time.time())
+            if delay is None:
+                raise weewx.WeeWxIOError(reason)
+            loginf("%s, restarting in %.1f seconds", reason, delay)
+            time.sleep(delay)
+            self._restart_policy.record(time.time())
+            try:
+                self._mgr.restart()
+                return
+            except weewx.WeeWxIOError as e:
+                logerr("restart failed: %s" % e)
+                reason = "%s" % e
+
+    def _parse_lines(self, lines):
+        # yield a (line, sensor_key, packet, mapped) tuple for each packet.
+        # json lines are parsed one at a time so that each packet can be
+        # associated with its line.  the line is None for packets from plain
+        # text.  the sensor_key of the line is found once, and only if the
+        # prefilter, the classifier, or the parser workers need it, otherwise
+        # it is None.
+        # mapped is the mapped packet if a parser worker mapped it, otherwise
+        # None.
+        text = []
+        wanted = []
+        keyed = self._prefilter or self._learn or self._pool is not None
+        for line in lines:
+            if line[:1] in ('{', b'{'):
+                key_ = None
+                if keyed and isinstance(line, bytes):
+                    key_ = LineClassifier.sensor_key(line)
+                    if self._prefilter and not \
+                            self._classifier.is_wanted_model(line, key_):
+                        self._filtered += 1
+                        continue
+                wanted.append((line, key_))
+            else:
+                text.append(line)
+        pooled = dict()
+        if self._pool is not None and wanted:
+            pooled = self._parse_pooled(wanted)
+        for (i, (line, key_)) in enumerate(wanted):
+            results = pooled.get(i)
+            if results is None:
+                t0 = time.time()
+                results = [(p, None) for p in PacketFactory.create([line])]
+                self._metrics.observe(
+                    'stage_seconds', time.time() - t0, (('stage', 'parse'),))
+            if results:
+                self._count_lines(1, results[0][0])
+            for (packet, mapped) in results:
+                yield line, key_, packet, mapped
+            if not results:
+                yield line, key_, None, None
+        if text:
+            t0 = time.time()
+            packets = list(PacketFactory.create(text))
+            self._metrics.observe(
+                'stage_seconds', time.time() - t0, (('stage', 'parse'),))
+            if packets:
+                self._count_lines(len(text), packets[0])
+            for packet in packets:
+                yield None, None, packet, None
+            if not packets:
+                yield None, None, None, None
+
+    def _count_lines(self, count, packet):
+        # count the lines parsed by the parser of the packet
+        sensor = Packet.sensor_of(packet)
+        self._metrics.inc('lines_parsed_total', count,
+                          (('parser', sensor[0] if sensor else ''),))
+
+    def _parse_pooled(self, lines):
+        # parse and map the json lines that have a sensor in the parser
+        # workers.  lines is a list of (line, sensor_key).  if a worker
+        # fails, stop using the workers and leave all of the lines to be
+        # parsed in process.
+        items = []
+        for (i, (line, key_)) in enumerate(lines):
+            if key_ is not None:
+                items.append((i, line, key_))
+        if not items:
+            return dict()
+        t0 = time.time()
+        results = self._pool.parse(items)
+        if results is None:
+            logerr("parser workers failed, parsing in process")
+            self._pool.shutdown()
+            self._pool = None
+            return dict()
+        self._metrics.observe(
+            'stage_seconds', time.time() - t0, (('stage', 'pool'),))
+        return results
+
+    def _log_unmapped_packet(self, line, lines, packet):
+        if not self._log_summary:
+            loginf("unmapped: %s (%s)", lines, packet)
+            return
+        sensor = Packet.sensor_of(packet)
+        if sensor is not None:
+            sensor = '%s:%s' % sensor
+        self._unmapped_log.add(sensor, packet)
+
+    def _log_unknown_line(self, line, lines):
+        if not self._log_summary:
+            loginf("unparsed: %s", lines)
+            return
+        key_ = LineClassifier.sensor_key(line) if line is not None else None
+        if key_ is not None:
+            sensor = key_[0].decode('utf-8', 'replace')
+        elif line is not None:
+            sensor = 'json'
+        else:
+            sensor = 'text'
+        self._unknown_log.add(sensor, lines)
+
+    def _log_stats(self):
+        # periodically report dropped and filtered lines and duplicates
+        now = time.time()
+        if not self._stats_interval or (
+                now - self._last_stats_ts < self._stats_interval):
+            return
+        self._last_stats_ts = now
+        dropped = self._mgr.get_dropped()
+        if dropped != self._last_dropped:
+            loginf("dropped lines: stdout=%s stderr=%s" %
+                   (dropped['stdout'], dropped['stderr']))
+            self._last_dropped = dropped
+        m = self._metrics
+        ms = dict()
+        for stage in ['parse', 'map']:
+            mean = m.mean('stage_seconds', (('stage', stage),))
+            ms[stage] = '%.3f' % (mean * 1000) if mean is not None else None
+        loginf("lines=%s filtered=%s packets=%s duplicates=%s unmapped=%s"
+               " unparsed=%s failures=%s queued=%s parse_ms=%s map_ms=%s",
+               m.total('lines_read_total'), self._filtered,
+               m.total('packets_total'), m.total('duplicates_total'),
+               m.total('unmapped_packets_total'),
+               m.total('unparsed_lines_total'),
+               m.total('parse_failures_total'),
+               self._mgr.stdout_queue.qsize(), ms['parse'], ms['map'])
+        if PacketFactory.repeat_cache is not None:
+            logdbg("repeated lines: hits=%s misses=%s",
+                   PacketFactory.repeat_cache.hits,
+                   PacketFactory.repeat_cache.misses)
+        radio = self._radio.summary()
+        if radio:
+            loginf("radio: %s", radio)
+        if self._radio.protocols:
+            logdbg("protocols: %s", self._radio.protocol_summary())
+        self._radio.reset_levels()
+        if self._log_unknown:
+            self._unknown_log.summarize()
+        if self._log_unmapped:
+            self._unmapped_log.summarize()
 
     def _calculate_deltas(self, pkt):
         for k in self._deltas:
@@ -2727,46 +5063,414 @@ class SDRDriver(weewx.drivers.AbstractDevice):
         # selectively get elements from the packet using the specified sensor
         # map.  if the identifier is found, then use its value.  if not, then
         # skip it completely (it is not given a None value).  include the
-        # time stamp and unit system only if we actually got data.
-        packet = dict()
-        for n in sensor_map.keys():
-            label = SDRDriver._find_match(sensor_map[n], pkt.keys())
-            if label:
-                packet[n] = pkt.get(label)
+        # time stamp and unit system only if we actually got data.  the map
+        # may be a dict or a SensorMap; a dict is compiled on every call, so
+        # callers that map many packets should compile it once.
+        if not isinstance(sensor_map, SensorMap):
+            sensor_map = SensorMap(sensor_map)
+        packet = sensor_map.map_packet(pkt)
         if packet:
             for k in ['dateTime', 'usUnits']:
                 packet[k] = pkt[k]
         return packet
 
+
+class SampleCorpus(object):
+    # the sample rtl_433 output in the comments of the packet classes, kept
+    # as a corpus with the packets each sample is expected to produce.  the
+    # corpus is used to check that changes to the parsers do not change the
+    # decoded values, and to measure how long each parser takes.
+
+    VERSION = 1
+    TS_PREFIX = re.compile(r'\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d')
+    CLASS_PATTERN = re.compile(r'class (\w+)\(')
+
     @staticmethod
-    def _find_match(pattern, keylist):
-        # find the first key in pkt that matches the specified pattern.
-        # the general form of a pattern is:
-        #   <observation_name>.<sensor_id>.<packet_type>
-        # do glob-style matching.
-        if pattern in keylist:
-            return pattern
-        match = None
-        pparts = pattern.split('.')
-        if len(pparts) == 3:
-            for k in keylist:
-                kparts = k.split('.')
-                if (len(kparts) == 3 and
-                    SDRDriver._part_match(pparts[0], kparts[0]) and
-                    SDRDriver._part_match(pparts[1], kparts[1]) and
-                    SDRDriver._part_match(pparts[2], kparts[2])):
-                    match = k
-                    break
-                elif pparts[0] == k:
-                    match = k
-                    break
-        return match
+    def extract(filename):
+        # return a list of (class_name, lines) for the samples in the comments
+        # of the classes in KNOWN_PACKETS in the named source file.  a json
+        # sample is one object, which may continue over several comment
+        # lines.  a text sample starts with a timestamp and continues until
+        # an empty comment line or the end of the comment.
+        known = set([x.__name__ for x in PacketFactory.KNOWN_PACKETS])
+        samples = []
+        cls = None
+        text = None
+        obj = None
+        with open(filename) as f:
+            for line in f:
+                stripped = line.strip()
+                comment = stripped[1:].strip() \
+                    if stripped.startswith('#') else None
+                if obj is not None:
+                    if comment:
+                        obj = '%s %s' % (obj, comment)
+                        end = SampleCorpus.json_end(obj)
+                        if end is None:
+                            continue
+                        obj = obj[:end]
+                        comment = None
+                    samples.append((cls, [obj]))
+                    obj = None
+                if text is not None and (
+                        not comment or comment.startswith('{') or
+                        SampleCorpus.TS_PREFIX.match(comment)):
+                    samples.append((cls, text))
+                    text = None
+                m = SampleCorpus.CLASS_PATTERN.match(line)
+                if m:
+                    cls = m.group(1)
+                if cls not in known or not comment:
+                    continue
+                if comment.startswith('{'):
+                    end = SampleCorpus.json_end(comment)
+                    if end is None:
+                        obj = comment
+                    else:
+                        samples.append((cls, [comment[:end]]))
+                elif text is not None:
+                    text.append(comment)
+                elif SampleCorpus.TS_PREFIX.match(comment):
+                    text = [comment]
+        if obj is not None:
+            samples.append((cls, [obj]))
+        if text is not None:
+            samples.append((cls, text))
+        return samples
+
+    @staticmethod
+    def json_end(text):
+        # the index just past the brace that closes the json object at the
+        # start of text, or None if the object is not closed
+        depth = 0
+        quoted = False
+        escaped = False
+        for (i, c) in enumerate(text):
+            if quoted:
+                if escaped:
+                    escaped = False
+                elif c == '\\':
+                    escaped = True
+                elif c == '"':
+                    quoted = False
+            elif c == '"':
+                quoted = True
+            elif c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+        return None
+
+    @staticmethod
+    def normalize(pkt):
+        # a packet as a plain dict that survives a round trip through json
+        import json as jsonlib
+        return jsonlib.loads(jsonlib.dumps(dict(pkt.items())))
+
+    @staticmethod
+    def build(samples):
+        # parse each sample and record the packets it produces
+        corpus = {'version': SampleCorpus.VERSION,
+                  'driver': DRIVER_VERSION,
+                  'samples': []}
+        for (cls, lines) in samples:
+            packets = list(PacketFactory.create(list(lines)))
+            parser = None
+            if packets:
+                sensor = Packet.sensor_of(packets[0])
+                parser = sensor[0] if sensor else None
+            corpus['samples'].append({
+                'source': cls,
+                'parser': parser,
+                'lines': lines,
+                'packets': [SampleCorpus.normalize(p) for p in packets]})
+        return corpus
 
     @staticmethod
-    def _part_match(pattern, value):
-        # use glob matching for parts of the tuple
-        matches = fnmatch.filter([value], pattern)
-        return True if matches else False
+    def load(filename):
+        import json as jsonlib
+        with open(filename) as f:
+            corpus = jsonlib.load(f)
+        if corpus.get('version') != SampleCorpus.VERSION:
+            raise ValueError("corpus version %s is not supported, expected %s"
+                             % (corpus.get('version'), SampleCorpus.VERSION))
+        return corpus
+
+    @staticmethod
+    def save(corpus, f):
+        import json as jsonlib
+        jsonlib.dump(corpus, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+    @staticmethod
+    def check(corpus):
+        # return a list of (sample, packets) for each sample that no longer
+        # produces the expected packets
+        failures = []
+        for sample in corpus['samples']:
+            packets = [SampleCorpus.normalize(p) for p in
+                       PacketFactory.create(list(sample['lines']))]
+            if packets != sample['packets']:
+                failures.append((sample, packets))
+        return failures
+
+    @staticmethod
+    def missing(corpus):
+        # the names of the classes in KNOWN_PACKETS that have no sample that
+        # produces a packet
+        have = set([x['source'] for x in corpus['samples'] if x['packets']])
+        return [x.__name__ for x in PacketFactory.KNOWN_PACKETS
+                if x.__name__ not in have]
+
+    @staticmethod
+    def bench_parsers(corpus, repeat):
+        # return a dict of parser name to (packets, seconds) for parsing
+        # every sample repeat times.  the repeat cache is disabled so that
+        # every line is actually parsed.
+        costs = dict()
+        saved = PacketFactory.repeat_cache
+        PacketFactory.repeat_cache = None
+        try:
+            for sample in corpus['samples']:
+                copies = [list(sample['lines']) for _ in range(repeat)]
+                t0 = timeit.default_timer()
+                for lines in copies:
+                    for _ in PacketFactory.create(lines):
+                        pass
+                secs = timeit.default_timer() - t0
+                name = sample['parser'] or 'unparsed'
+                cost = costs.setdefault(name, [0, 0.0])
+                cost[0] += repeat * max(len(sample['packets']), 1)
+                cost[1] += secs
+        finally:
+            PacketFactory.repeat_cache = saved
+        return costs
+
+    @staticmethod
+    def sensor_maps(corpus):
+        # return a small, a large, and a wildcard sensor map for the packets
+        # in the corpus.  the large map has an entry for every observation of
+        # every sensor, the wildcard map matches any sensor id.
+        keys = []
+        for sample in corpus['samples']:
+            for pkt in sample['packets']:
+                for k in sorted(pkt):
+                    if k.count('.') == 2 and k not in keys:
+                        keys.append(k)
+        large = dict(('field%d' % i, k) for (i, k) in enumerate(keys))
+        small = dict(('field%d' % i, k) for (i, k) in enumerate(keys[:5]))
+        patterns = []
+        for k in keys:
+            (obs, _, pkt_type) = k.split('.')
+            for p in ['%s.*.%s' % (obs, pkt_type), '%s.*.*' % obs]:
+                if p not in patterns:
+                    patterns.append(p)
+        wildcard = dict(('field%d' % i, p) for (i, p) in enumerate(patterns))
+        return [('small', small), ('large', large), ('wildcard', wildcard)]
+
+    @staticmethod
+    def bench_maps(corpus, repeat):
+        # return a list of (name, entries, packets, seconds) for mapping the
+        # corpus packets with each of the sensor maps
+        packets = []
+        for sample in corpus['samples']:
+            packets.extend(PacketFactory.create(list(sample['lines'])))
+        results = []
+        for (name, sensor_map) in SampleCorpus.sensor_maps(corpus):
+            smap = SensorMap(sensor_map)
+            t0 = timeit.default_timer()
+            for _ in range(repeat):
+                for pkt in packets:
+                    SDRDriver.map_to_fields(pkt, smap)
+            secs = timeit.default_timer() - t0
+            results.append((name, len(sensor_map), repeat * len(packets), secs))
+        return results
+
+
+class LoadGenerator(object):
+    # emit json lines like those from rtl_433, for testing the driver without
+    # a radio.  the lines are the json samples from the comments of the
+    # packet classes with the current time, and with ids for up to sensors
+    # different sensors of each type.  each transmission is repeated,
+    # as most sensors do, and a fraction of the lines are from unknown models
+    # or are malformed.  lines are written in bursts of burst lines, spaced
+    # to give an average of rate lines per second.
+
+    def __init__(self, samples, rate=100.0, burst=1, repeats=2, sensors=20,
+                 unknown=0.05, malformed=0.01, seed=None):
+        import json as jsonlib
+        import random
+        self._jsonlib = jsonlib
+        self._random = random.Random(seed)
+        self.objects = []
+        for line in samples:
+            try:
+                obj = jsonlib.loads(line)
+            except ValueError:
+                continue
+            if 'model' in obj:
+                self.objects.append(obj)
+        if not self.objects:
+            raise ValueError("no json samples")
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self.repeats = max(int(repeats), 1)
+        self.sensors = max(int(sensors), 1)
+        self.unknown = unknown
+        self.malformed = malformed
+
+    def lines(self, now):
+        # return the lines for one transmission
+        obj = dict(self._random.choice(self.objects))
+        obj['time'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)) \
+            + '.%06d' % int((now % 1) * 1000000)
+        if 'id' in obj:
+            obj['id'] = self._random.randint(1, self.sensors)
+        x = self._random.random()
+        if x < self.unknown:
+            obj['model'] = 'Unknown-%d' % self._random.randint(1, 20)
+        line = self._jsonlib.dumps(obj)
+        if x > 1.0 - self.malformed:
+            line = line[:self._random.randint(1, len(line) - 1)]
+        return [line] * self.repeats
+
+    def run(self, f, duration=0):
+        # write bursts of lines to the file until duration seconds have
+        # passed, or forever if the duration is 0
+        start = time.time()
+        sent = 0
+        while not duration or time.time() - start < duration:
+            now = time.time()
+            batch = []
+            while len(batch) < self.burst:
+                batch.extend(self.lines(now))
+            f.write('\n'.join(batch) + '\n')
+            f.flush()
+            sent += len(batch)
+            delay = start + sent / self.rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return sent
+
+
+def soak_driver(driver, duration, interval):
+    # read LOOP packets from the driver for duration seconds and yield a
+    # dict of measurements every interval seconds: lines and packets per
+    # second, the latency from the packet time to the LOOP packet, dropped
+    # lines, and the cpu and memory use of the driver and of rtl_433.  the
+    # driver runs in a thread, so there is a report for every interval even
+    # when no packets arrive.  the driver is closed at the end, and the
+    # report has an error if the driver fails.
+    m = driver._metrics
+    own = ProcessSampler()
+    child = ProcessSampler()
+    loop = queue.Queue()
+
+    def run():
+        try:
+            for pkt in driver.genLoopPackets():
+                loop.put((time.time(), pkt))
+        except Exception as e:
+            loop.put((time.time(), e))
+
+    thread = threading.Thread(target=run, name='soak-driver')
+    thread.daemon = True
+    start = last_ts = time.time()
+    own.sample(os.getpid(), start)
+    child.sample(driver._mgr.pid(), start)
+    thread.start()
+    last_lines = last_packets = 0
+    latency = []
+    error = None
+    try:
+        while True:
+            next_ts = min(last_ts + interval, start + duration)
+            try:
+                (ts, pkt) = loop.get(True, max(0, next_ts - time.time()))
+            except queue.Empty:
+                pass
+            else:
+                if isinstance(pkt, Exception):
+                    error = pkt
+                else:
+                    latency.append(ts - pkt['dateTime'])
+            now = time.time()
+            if now < next_ts and error is None:
+                continue
+            own.sample(os.getpid(), now)
+            child.sample(driver._mgr.pid(), now)
+            lines = m.total('lines_read_total')
+            packets = m.total('packets_total')
+            dropped = driver._mgr.get_dropped()
+            elapsed = max(now - last_ts, 0.001)
+            yield {'elapsed': now - start,
+                   'lines_per_second': (lines - last_lines) / elapsed,
+                   'packets_per_second': (packets - last_packets) / elapsed,
+                   'latency_mean': sum(latency) / len(latency)
+                   if latency else None,
+                   'latency_max': max(latency) if latency else None,
+                   'dropped': dropped['stdout'] + dropped['stderr'],
+                   'duplicates': m.total('duplicates_total'),
+                   'unparsed': m.total('unparsed_lines_total'),
+                   'cpu_percent': own.cpu_percent,
+                   'rss_mb': own.rss_bytes / 1048576.0
+                   if own.rss_bytes is not None else None,
+                   'rtl_cpu_percent': child.cpu_percent,
+                   'error': error}
+            (last_ts, last_lines, last_packets) = (now, lines, packets)
+            latency = []
+            if error is not None or now - start >= duration:
+                break
+    finally:
+        # do not let the driver restart rtl_433 once it is closed
+        driver._restart_policy = RestartPolicy(max_restarts=0)
+        driver.closePort()
+        thread.join(ProcManager.KILL_WAIT)
+
+
+class ReplayDriver(SDRDriver):
+    # a driver that is handed lines, such as saved rtl_433 output, instead of
+    # running rtl_433 itself
+
+    def _startup(self, cmd, path, ld_library_path):
+        pass
+
+
+def profile_pipeline(frames, driver, max_lines=0, duration=0):
+    # run the frames of lines through the parsing and packet handling of the
+    # driver under cProfile, for up to max_lines lines or duration seconds.
+    # return the profile, the number of lines, the seconds spent working,
+    # and the count and seconds for each parser, where the count is packets
+    # or unparsed lines.  the time spent waiting for lines is not counted.
+    import cProfile
+    costs = dict()
+    profiler = cProfile.Profile()
+    count = 0
+    busy = 0.0
+    end_ts = time.time() + duration if duration else None
+    for lines in frames:
+        count += len(lines)
+        profiler.enable()
+        t0 = t1 = time.time()
+        for (line, key_, packet, mapped) in driver._parse_lines(lines):
+            driver._handle_packet(line, key_, packet, mapped, lines)
+            name = 'unparsed'
+            if packet:
+                sensor = Packet.sensor_of(packet)
+                name = sensor[0] if sensor else 'unknown'
+            now = time.time()
+            cost = costs.setdefault(name, [0, 0.0])
+            cost[0] += 1
+            cost[1] += now - t1
+            t1 = now
+        busy += time.time() - t0
+        profiler.disable()
+        if (max_lines and count >= max_lines) or (
+                end_ts is not None and time.time() > end_ts):
+            break
+    return profiler, count, busy, costs
 
 
 def main():
@@ -2774,13 +5478,42 @@ def main():
     import syslog
 
     usage = """%prog [--debug] [--help] [--version]
-        [--action=(show-packets | show-detected | list-supported)]
+        [--action=(show-packets | show-detected | list-supported |
+                   suggest-cmd | profile | make-corpus | benchmark |
+                   fake-rtl | soak)]
+        [--duration=SECONDS] [--input=FILE] [--count=LINES]
+        [--config=WEEWX_CONF] [--corpus=FILE] [--repeat=N]
+        [--rate=LINES_PER_SECOND] [--burst=LINES] [--interval=SECONDS]
         [--cmd=RTL_CMD] [--path=PATH] [--ld_library_path=LD_LIBRARY_PATH]
+        [--reader_mode=(line | chunk | select)]
+        [--json_decoder=(auto | orjson | simdjson | ujson | json)]
 
 Actions:
   show-packets: display each packet (default)
   show-detected: display a running count of the number of each packet type
   list-supported: show a list of the supported packet types
+  suggest-cmd: watch the traffic for --duration seconds, then suggest an
+    rtl_433 command that runs only the decoders for the packets seen
+  profile: parse and map the output of the cmd, or of rtl_433 output saved
+    in the --input file, for --duration seconds or --count lines, then show
+    where the time went.  the sensor_map and deltas are read from the [SDR]
+    section of the --config file.
+  make-corpus: print a corpus of the sample output in the comments of the
+    packet classes, with the packets each sample produces.  the samples are
+    read from this file, or from the --input file.
+  benchmark: check that each sample in the --corpus file still produces the
+    expected packets, then parse each sample --repeat times and map the
+    packets with small, large, and wildcard sensor maps, and show the time
+    for each packet.
+  fake-rtl: act like rtl_433, writing json lines built from the samples in
+    the comments of the packet classes at --rate lines per second, in
+    bursts of --burst lines, until killed.  the lines include repeated
+    transmissions, unknown models, and malformed lines.
+  soak: run the driver with fake-rtl as the cmd for --duration seconds and
+    show the lines and packets per second, the LOOP latency, the dropped
+    lines, and the cpu and memory use every --interval seconds.  the driver
+    options are read from the [SDR] section of the --config file.  without
+    a --config, every packet type is mapped with a wildcard sensor_map.
 
 Hide:
   This is a comma-separate list of the types of data that should not be
@@ -2799,10 +5532,32 @@ Hide:
                       help='value for PATH')
     parser.add_option('--ld_library_path', dest='ld_library_path',
                       help='value for LD_LIBRARY_PATH')
+    parser.add_option('--reader_mode', dest='reader_mode', default='line',
+                      help='how to read rtl output: line, chunk, or select')
+    parser.add_option('--json_decoder', dest='json_decoder', default='auto',
+                      help='json decoder: auto, orjson, simdjson, ujson, json')
+    parser.add_option('--duration', dest='duration', type=int, default=60,
+                      help='seconds to watch the traffic for suggest-cmd')
+    parser.add_option('--input', dest='input',
+                      help='file of rtl_433 output to profile instead of cmd')
+    parser.add_option('--count', dest='count', type=int, default=0,
+                      help='number of lines to profile, 0 for no limit')
+    parser.add_option('--config', dest='config',
+                      help='weewx configuration file with the sensor_map')
+    parser.add_option('--corpus', dest='corpus',
+                      help='corpus of sample output for benchmark')
+    parser.add_option('--repeat', dest='repeat', type=int, default=100,
+                      help='number of times to repeat each benchmark')
+    parser.add_option('--rate', dest='rate', type=float, default=100.0,
+                      help='lines per second for fake-rtl and soak')
+    parser.add_option('--burst', dest='burst', type=int, default=1,
+                      help='lines per burst for fake-rtl and soak')
+    parser.add_option('--interval', dest='interval', type=int, default=10,
+                      help='seconds between soak reports')
     parser.add_option('--hide', dest='hidden', default='empty',
                       help='output to be hidden: out, parsed, unparsed, empty')
     parser.add_option('--action', dest='action', default='show-packets',
-                      help='actions include show-packets, show-detected, list-supported')
+                      help='actions include show-packets, show-detected, list-supported, suggest-cmd, profile, make-corpus, benchmark, fake-rtl, soak')
 
     (options, args) = parser.parse_args()
 
@@ -2813,12 +5568,172 @@ Hide:
     if options.debug:
         syslog.setlogmask(syslog.LOG_UPTO(syslog.LOG_DEBUG))
 
+    PacketFactory.json_decoder = JsonDecoder(options.json_decoder)
+
     if options.action == 'list-supported':
         for pt in PacketFactory.KNOWN_PACKETS:
             print(pt.IDENTIFIER)
+    elif options.action == 'suggest-cmd':
+        # watch the traffic for a while, then suggest a command that runs
+        # only the decoders for the packet types that were seen
+        mgr = ProcManager.create(options.reader_mode)
+        mgr.startup(options.cmd, path=options.path,
+                    ld_library_path=options.ld_library_path)
+        seen = dict()
+        end_ts = time.time() + options.duration
+        for lines in mgr.get_stdout(ProcManager.POLL_INTERVAL):
+            for p in PacketFactory.create(lines):
+                sensor = Packet.sensor_of(p)
+                if sensor is not None:
+                    seen[sensor[0]] = seen.get(sensor[0], 0) + 1
+            if time.time() > end_ts:
+                break
+        mgr.shutdown()
+        for name in sorted(seen):
+            parser = PacketFactory._parsers_by_type[name]
+            print("%s: %s packets, protocols %s" %
+                  (name, seen[name], parser.PROTOCOLS or 'unknown'))
+        unknown = [x for x in sorted(seen)
+                   if not PacketFactory._parsers_by_type[x].PROTOCOLS]
+        protocols = PacketFactory.protocols_for(
+            [x for x in seen if x not in unknown])
+        if protocols:
+            print("suggested cmd: %s" %
+                  SDRDriver.build_cmd(options.cmd, protocols))
+            if unknown:
+                print("add the protocols for %s by hand, see 'rtl_433 -R help'"
+                      % ', '.join(unknown))
+        else:
+            print("no suggestion: no packets with known protocols were seen")
+    elif options.action == 'profile':
+        import pstats
+        stn_dict = dict()
+        if options.config:
+            import configobj
+            config_dict = configobj.ConfigObj(options.config, file_error=True)
+            stn_dict.update(config_dict.get(DRIVER_NAME, {}))
+        stn_dict.update(cmd=options.cmd, metrics_port=0,
+                        reader_mode=options.reader_mode,
+                        json_decoder=options.json_decoder)
+        if options.path:
+            stn_dict['path'] = options.path
+        if options.ld_library_path:
+            stn_dict['ld_library_path'] = options.ld_library_path
+        if options.input:
+            def read_frames(fn):
+                framer = LineFramer()
+                with open(fn, 'rb') as f:
+                    for line in f:
+                        for frame in framer.add([line.rstrip(b'\r\n')], 0):
+                            yield frame
+                for frame in framer.flush():
+                    yield frame
+            driver = ReplayDriver(**stn_dict)
+            frames = read_frames(options.input)
+            duration = 0
+        else:
+            driver = SDRDriver(**stn_dict)
+            frames = driver._mgr.get_stdout(ProcManager.POLL_INTERVAL)
+            duration = options.duration
+        t0 = time.time()
+        (profiler, count, busy, costs) = profile_pipeline(
+            frames, driver, options.count, duration)
+        elapsed = time.time() - t0
+        driver.closePort()
+        print("%s lines in %.3f seconds of work, %.3f seconds elapsed" %
+              (count, busy, elapsed))
+        if busy > 0:
+            print("%.0f lines per second of work" % (count / busy))
+        if driver._filtered:
+            print("%s lines discarded by the prefilter" % driver._filtered)
+        print("")
+        print("%-30s %8s %10s %10s" % ('parser', 'count', 'total ms', 'us each'))
+        for name in sorted(costs, key=lambda x: -costs[x][1]):
+            (n, secs) = costs[name]
+            print("%-30s %8d %10.2f %10.1f" %
+                  (name, n, secs * 1000, secs * 1000000 / n))
+        print("")
+        stats = pstats.Stats(profiler)
+        stats.sort_stats('tottime').print_stats(20)
+    elif options.action == 'make-corpus':
+        import sys
+        source = options.input or os.path.splitext(__file__)[0] + '.py'
+        corpus = SampleCorpus.build(SampleCorpus.extract(source))
+        SampleCorpus.save(corpus, sys.stdout)
+    elif options.action == 'benchmark':
+        if not options.corpus:
+            print("benchmark requires a --corpus file, see make-corpus")
+            exit(1)
+        corpus = SampleCorpus.load(options.corpus)
+        failures = SampleCorpus.check(corpus)
+        for (sample, packets) in failures:
+            print("mismatch for %s sample %s" %
+                  (sample['source'], sample['lines'][0]))
+            print("  expected: %s" % sample['packets'])
+            print("  actual:   %s" % packets)
+        print("%d of %d samples produce the expected packets" %
+              (len(corpus['samples']) - len(failures), len(corpus['samples'])))
+        print("")
+        costs = SampleCorpus.bench_parsers(corpus, options.repeat)
+        print("%-30s %8s %10s" % ('parser', 'packets', 'ns each'))
+        for name in sorted(costs):
+            (n, secs) = costs[name]
+            print("%-30s %8d %10.0f" % (name, n, secs * 1e9 / n))
+        missing = SampleCorpus.missing(corpus)
+        if missing:
+            print("no samples for %s" % ', '.join(sorted(missing)))
+        print("")
+        print("%-30s %8s %8s %10s" %
+              ('sensor_map', 'entries', 'packets', 'ns each'))
+        for (name, entries, n, secs) in SampleCorpus.bench_maps(
+                corpus, options.repeat):
+            print("%-30s %8d %8d %10.0f" %
+                  (name, entries, n, secs * 1e9 / n if n else 0))
+        if failures:
+            exit(1)
+    elif options.action == 'fake-rtl':
+        import sys
+        source = options.input or os.path.splitext(__file__)[0] + '.py'
+        samples = [x[1][0] for x in SampleCorpus.extract(source)
+                   if x[1][0].startswith('{')]
+        gen = LoadGenerator(samples, options.rate, options.burst)
+        try:
+            gen.run(sys.stdout)
+        except (IOError, KeyboardInterrupt):
+            pass
+    elif options.action == 'soak':
+        import sys
+        source = os.path.splitext(__file__)[0] + '.py'
+        stn_dict = dict()
+        if options.config:
+            import configobj
+            config_dict = configobj.ConfigObj(options.config, file_error=True)
+            stn_dict.update(config_dict.get(DRIVER_NAME, {}))
+        else:
+            corpus = SampleCorpus.build(SampleCorpus.extract(source))
+            stn_dict['sensor_map'] = dict(SampleCorpus.sensor_maps(corpus))[
+                'wildcard']
+        stn_dict['cmd'] = '%s %s --action=fake-rtl --rate=%s --burst=%s' % (
+            sys.executable, source, options.rate, options.burst)
+        stn_dict['reader_mode'] = options.reader_mode
+        driver = SDRDriver(**stn_dict)
+        print("%8s %8s %8s %8s %8s %8s %8s %8s %8s" %
+              ('seconds', 'lines/s', 'loop/s', 'lat avg', 'lat max',
+               'dropped', 'cpu %', 'rss mb', 'rtl cpu'))
+        def fmt(value, spec):
+            return spec % value if value is not None else '-'
+        for r in soak_driver(driver, options.duration, options.interval):
+            print("%8.0f %8.1f %8.1f %8s %8s %8d %8s %8s %8s" % (
+                r['elapsed'], r['lines_per_second'], r['packets_per_second'],
+                fmt(r['latency_mean'], '%.3f'), fmt(r['latency_max'], '%.3f'),
+                r['dropped'], fmt(r['cpu_percent'], '%.1f'),
+                fmt(r['rss_mb'], '%.1f'), fmt(r['rtl_cpu_percent'], '%.1f')))
+            if r['error'] is not None:
+                print("driver failed: %s" % r['error'])
+            sys.stdout.flush()
     elif options.action == 'show-detected':
         # display identifiers for detected sensors
-        mgr = ProcManager()
+        mgr = ProcManager.create(options.reader_mode)
         mgr.startup(options.cmd, path=options.path,
                     ld_library_path=options.ld_library_path)
         detected = dict()
@@ -2837,7 +5752,7 @@ Hide:
     else:
         # display output and parsed/unparsed packets
         hidden = [x.strip() for x in options.hidden.split(',')]
-        mgr = ProcManager()
+        mgr = ProcManager.create(options.reader_mode)
         mgr.startup(options.cmd, path=options.path,
                     ld_library_path=options.ld_library_path)
         for lines in mgr.get_stdout():
@@ -0,0 +1,128 @@
+# tests for the classification of raw lines by sensor
+# Distributed under the terms of the GNU Public License (GPLv3)
+
+import os
+import sys
+import unittest
+
+TOP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(TOP, 'bin'))
+
+import user.sdr as sdr
+
+# pairs of lines from two different sensors of the same model that differ
+# only in the field that the parser uses to tell the sensors apart
+SENSOR_PAIRS = [
+    ('rc',
+     b'{"time" : "2016-11-04 14:44:37", "model" : "HIDEKI TS04 sensor", "rc" : 9, "channel" : 1, "battery" : "OK", "temperature_C" : 12.400, "humidity" : 61}',
+     b'{"time" : "2016-11-04 14:44:38", "model" : "HIDEKI TS04 sensor", "rc" : 5, "channel" : 1, "battery" : "OK", "temperature_C" : 20.100, "humidity" : 40}'),
+    ('sid',
+     b'{"time" : "2017-01-10 21:06:41", "model" : "Springfield Temperature & Moisture", "sid" : 224, "channel" : 3, "battery" : "OK", "transmit" : "AUTO", "temperature_C" : -1.000, "moisture" : 9}',
+     b'{"time" : "2017-01-10 21:06:42", "model" : "Springfield Temperature & Moisture", "sid" : 37, "channel" : 3, "battery" : "OK", "transmit" : "AUTO", "temperature_C" : 4.000, "moisture" : 1}'),
+    ('device',
+     b'{"time" : "2017-01-21 13:01:30", "model" : "Ambientweather-F007TH", "device" : 80, "channel" : 1, "temperature_F" : 61.800, "humidity" : 10}',
+     b'{"time" : "2017-01-21 13:01:31", "model" : "Ambientweather-F007TH", "device" : 81, "channel" : 1, "temperature_F" : 70.100, "humidity" : 30}'),
+    ('ws_id',
+     b'{"time" : "2018-11-07 05:18:27", "model" : "LaCrosse WS", "ws_id" : 14, "id" : 1, "temperature_C" : 7.100}',
+     b'{"time" : "2018-11-07 05:18:28", "model" : "LaCrosse WS", "ws_id" : 15, "id" : 1, "temperature_C" : 9.200}'),
+    ]
+
+
+def sensor_of_line(line):
+    packets = list(sdr.PacketFactory.create([line]))
+    return sdr.Packet.sensor_of(packets[0])
+
+
+class LineClassifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_cache = sdr.PacketFactory.repeat_cache
+        sdr.PacketFactory.repeat_cache = None
+
+    def tearDown(self):
+        sdr.PacketFactory.repeat_cache = self.saved_cache
+
+    def test_sensor_key_tells_sensors_apart(self):
+        for (field, a, b) in SENSOR_PAIRS:
+            self.assertNotEqual(sensor_of_line(a), sensor_of_line(b), field)
+            self.assertNotEqual(sdr.LineClassifier.sensor_key(a),
+                                sdr.LineClassifier.sensor_key(b), field)
+
+    def test_learns_each_sensor_that_shares_a_channel(self):
+        for (field, a, b) in SENSOR_PAIRS:
+            (pkt_type, sensor_id) = sensor_of_line(a)
+            mapper = sdr.SensorMap({
+                'outTemp': 'temperature.%s.%s' % (sensor_id, pkt_type)})
+            classifier = sdr.LineClassifier(mapper)
+            for line in [a, b, a, b]:
+                sensor = sensor_of_line(line)
+                classifier.learn(sdr.LineClassifier.sensor_key(line), sensor,
+                                 mapper.maps_sensor(*sensor))
+            self.assertTrue(classifier.is_wanted(a), field)
+            self.assertFalse(classifier.is_wanted(b), field)
+
+    def test_lines_from_different_sensors_with_one_key_are_wanted(self):
+        (field, a, b) = SENSOR_PAIRS[0]
+        (pkt_type, sensor_id) = sensor_of_line(a)
+        mapper = sdr.SensorMap({
+            'outTemp': 'temperature.%s.%s' % (sensor_id, pkt_type)})
+        classifier = sdr.LineClassifier(mapper)
+        key_ = sdr.LineClassifier.sensor_key(b)
+        classifier.learn(key_, sensor_of_line(b), False)
+        self.assertFalse(classifier.is_wanted_key(b, key_))
+        classifier.learn(key_, sensor_of_line(a), True)
+        self.assertTrue(classifier.is_wanted_key(b, key_))
+        classifier.learn(key_, sensor_of_line(b), False)
+        self.assertTrue(classifier.is_wanted_key(b, key_))
+
+
+class DriverClassifierTest(unittest.TestCase):
+    # two HIDEKI TS04 sensors on channel 1, only one of which is mapped
+
+    def setUp(self):
+        self.saved_cache = sdr.PacketFactory.repeat_cache
+        self.driver = sdr.ReplayDriver(
+            sensor_map={'outTemp': 'temperature.1:9.HidekiTS04Packet'},
+            priority_lane=True)
+
+    def tearDown(self):
+        self.driver.closePort()
+        sdr.PacketFactory.repeat_cache = self.saved_cache
+
+    def loop_packets(self, lines):
+        packets = []
+        for (line, key_, packet, mapped) in self.driver._parse_lines(lines):
+            pkt = self.driver._handle_packet(line, key_, packet, mapped, lines)
+            if pkt is not None:
+                packets.append(pkt)
+        return packets
+
+    def test_mapped_sensor_is_not_lost_after_unmapped_neighbour(self):
+        (_, mine, theirs) = SENSOR_PAIRS[0]
+        self.assertEqual(len(self.loop_packets([mine])), 1)
+        self.assertEqual(self.loop_packets([theirs]), [])
+        for i in range(3):
+            line = mine.replace(b'12.400', b'1%d.500' % i)
+            packets = self.loop_packets([line])
+            self.assertEqual(len(packets), 1)
+            self.assertIn('outTemp', packets[0])
+        classifier = self.driver._classifier
+        self.assertTrue(classifier.is_wanted(mine))
+        self.assertFalse(classifier.is_wanted(theirs))
+
+    def test_prefilter_discards_only_models_that_cannot_be_mapped(self):
+        (_, mine, theirs) = SENSOR_PAIRS[0]
+        (_, other_model, _) = SENSOR_PAIRS[1]
+        self.assertTrue(self.driver._prefilter)
+        # whatever is learned about a sensor, lines of a mapped packet type
+        # are decoded, so a sensor with the same raw identifiers as an
+        # unmapped one cannot be discarded
+        key_ = sdr.LineClassifier.sensor_key(mine)
+        self.driver._classifier.learn(key_, ('HidekiTS04Packet', '1:5'), False)
+        self.assertEqual(len(self.loop_packets([theirs, mine, other_model])),
+                         1)
+        self.assertEqual(self.driver._filtered, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
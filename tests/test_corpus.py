@@ -0,0 +1,62 @@
+# tests for the sample corpus in corpus/samples.json
+# Distributed under the terms of the GNU Public License (GPLv3)
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TOP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(TOP, 'bin'))
+
+import user.sdr as sdr
+
+CORPUS = os.path.join(TOP, 'corpus', 'samples.json')
+SOURCE = os.path.splitext(sdr.__file__)[0] + '.py'
+
+
+class SampleCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.corpus = sdr.SampleCorpus.load(CORPUS)
+
+    def test_every_packet_class_has_a_sample(self):
+        self.assertEqual(sdr.SampleCorpus.missing(self.corpus), [])
+
+    def test_samples_produce_the_expected_packets(self):
+        failures = sdr.SampleCorpus.check(self.corpus)
+        self.assertEqual([(x['source'], x['lines']) for (x, _) in failures],
+                         [])
+
+    def test_corpus_has_every_sample_in_the_source(self):
+        samples = sdr.SampleCorpus.extract(SOURCE)
+        self.assertEqual(
+            [(x['source'], x['lines']) for x in self.corpus['samples']],
+            [(cls, lines) for (cls, lines) in samples])
+
+    def test_extract_joins_json_over_several_lines(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'sample.py')
+            with open(filename, 'w') as f:
+                f.write('class Bresser5in1Packet(Packet):\n'
+                        '    # {"time" : "2018-12-15 16:04:04",\n'
+                        '    # "model" : "Bresser-5in1", "id" : 118,\n'
+                        '    # "data" : "{}"}#012\n'
+                        '    # {"time" : "2018-12-15 16:04:05", "id" : 1}\n'
+                        '\n'
+                        'class NotAPacketParser(object):\n'
+                        '    # {"time" : "2018-12-15 16:04:06"}\n')
+            self.assertEqual(sdr.SampleCorpus.extract(filename), [
+                ('Bresser5in1Packet',
+                 ['{"time" : "2018-12-15 16:04:04", "model" : "Bresser-5in1",'
+                  ' "id" : 118, "data" : "{}"}']),
+                ('Bresser5in1Packet',
+                 ['{"time" : "2018-12-15 16:04:05", "id" : 1}'])])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
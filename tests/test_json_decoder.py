@@ -0,0 +1,89 @@
+# tests that each json decoder decodes as the standard library does
+# Distributed under the terms of the GNU Public License (GPLv3)
+
+import json
+import os
+import sys
+import unittest
+
+TOP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(TOP, 'bin'))
+
+import user.sdr as sdr
+
+CORPUS = os.path.join(TOP, 'corpus', 'samples.json')
+
+# lines that the samples do not cover: floats that look like integers,
+# exponents, negative zero, big integers, unicode escapes and raw utf-8,
+# nested values, and the json literals
+EXTRA_LINES = [
+    b'{"model" : "x", "a" : 5.000, "b" : 5, "c" : 1.0e+01, "d" : 1E-2}',
+    b'{"model" : "x", "a" : -0.0, "b" : -0, "c" : 0.1, "d" : 1.7976931348623157e308}',
+    b'{"model" : "x", "a" : 18446744073709551615, "b" : -9223372036854775808}',
+    b'{"model" : "caf\\u00e9", "note" : "\\ud83c\\udf27 \\"rain\\" \\\\ \\t"}',
+    b'{"model" : "caf\xc3\xa9", "note" : "\xe2\x98\x94"}',
+    b'{"model" : "x", "codes" : [1, 2.5, "3", [], {}], "obj" : {"k" : [null]}}',
+    b'{"model" : "x", "a" : true, "b" : false, "c" : null, "d" : ""}',
+    ]
+
+# lines that every decoder must reject with a ValueError, which is what the
+# driver catches
+MALFORMED_LINES = [
+    b'{"model" : "x", "id" : 1',
+    b'{"model" : "x", "id" : 1}}',
+    b'{"model" : "x", "id" : }',
+    b'{"model" : "x" "id" : 1}',
+    b'',
+    ]
+
+
+def corpus_lines():
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+    lines = []
+    for sample in corpus['samples']:
+        for line in sample['lines']:
+            if line.startswith('{'):
+                lines.append(line.encode('utf-8'))
+    return lines
+
+
+class JsonDecoderTest(unittest.TestCase):
+
+    def check_decoder(self, name):
+        decoder = sdr.JsonDecoder(name)
+        if decoder.name != name:
+            self.skipTest("json decoder %s is not installed" % name)
+        lines = corpus_lines()
+        self.assertTrue(lines)
+        for line in lines + EXTRA_LINES:
+            expected = json.loads(line.decode('utf-8'))
+            for value in [line, line.decode('utf-8')]:
+                actual = decoder.loads(value)
+                self.assertTrue(sdr.JsonDecoder.same(actual, expected),
+                                "%s decoded %r as %r, expected %r" %
+                                (name, value, actual, expected))
+        for line in MALFORMED_LINES:
+            self.assertRaises(ValueError, decoder.loads, line)
+
+    def test_json(self):
+        self.check_decoder('json')
+
+    def test_orjson(self):
+        self.check_decoder('orjson')
+
+    def test_simdjson(self):
+        self.check_decoder('simdjson')
+
+    def test_ujson(self):
+        self.check_decoder('ujson')
+
+    def test_same_tells_int_from_float(self):
+        self.assertTrue(sdr.JsonDecoder.same({'a': [1, 'b']}, {'a': [1, 'b']}))
+        self.assertFalse(sdr.JsonDecoder.same({'a': 10}, {'a': 10.0}))
+        self.assertFalse(sdr.JsonDecoder.same({'a': [1]}, {'a': [1, 2]}))
+        self.assertFalse(sdr.JsonDecoder.same({'a': 1}, {'b': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()